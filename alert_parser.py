@@ -1,25 +1,15 @@
-import re
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
+
+from ma_alert_regex import LINES_PATTERN, PATTERN, parse_fields
 
 # Example line:
 # CRCL - MA Alert - 1 - price: 139.00 - SMA_20: 140.80,  EMA_20: 141.12, EMA_9: 138.78 - 20250815040103
 
-LINE_RE = re.compile(
-    r"""
-    ^
-    (?P<symbol>[A-Z]+(?:\.[A-Z]+)?)\s*-\s*MA\s+Alert\s*-\s*(?P<alert>\d+)\s*-\s*
-    price:\s*(?P<price>-?\d+(?:\.\d+)?)\s*-\s*
-    SMA_20:\s*(?P<sma20>-?\d+(?:\.\d+)?),\s*EMA_20:\s*(?P<ema20>-?\d+(?:\.\d+)?),\s*EMA_9:\s*(?P<ema9>-?\d+(?:\.\d+)?)
-    \s*-\s*
-    (?P<ts>\d{14})
-    $
-    """,
-    re.VERBOSE,
-)
+LINE_RE = PATTERN  # shared with price_alerts.pattern; the timestamp group is "timestamp"
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ParsedAlert:
     symbol: str
     price: float
@@ -30,15 +20,27 @@ class ParsedAlert:
     alert_id: int
 
 def parse_alert_line(line: str) -> Optional[ParsedAlert]:
-    m = LINE_RE.match(line.strip())
-    if not m: return None
-    ts = datetime.strptime(m.group("ts"), "%Y%m%d%H%M%S")
-    return ParsedAlert(
-        symbol=m.group("symbol"),
-        price=float(m.group("price")),
-        sma20=float(m.group("sma20")),
-        ema20=float(m.group("ema20")),
-        ema9=float(m.group("ema9")),
-        ts=ts,
-        alert_id=int(m.group("alert")),
-    )
+    if "MA Alert" not in line: return None  # cheap substring check before the regex
+    t = parse_fields(line.strip())
+    if t is None: return None
+    symbol, alert_id, price, sma20, ema20, ema9, ts = t
+    # fixed YYYYMMDDHHMMSS: slicing is far cheaper than strptime
+    try:
+        dt = datetime(int(ts[0:4]), int(ts[4:6]), int(ts[6:8]), int(ts[8:10]), int(ts[10:12]), int(ts[12:14]))
+    except ValueError:
+        return None  # 14 digits but not a real date/time
+    return ParsedAlert(symbol=symbol, price=price, sma20=sma20, ema20=ema20, ema9=ema9, ts=dt, alert_id=alert_id)
+
+def parse_alert_lines(text: str) -> List[ParsedAlert]:
+    """
+    Every alert line of a multi-line `text` (a tailed file chunk), in order, from one LINES_PATTERN
+    findall: no splitlines(), no call or substring check per line. Spacing is matched as [ \t].
+    """
+    alerts: List[ParsedAlert] = []
+    for symbol, alert_id, price, sma20, ema20, ema9, ts in LINES_PATTERN.findall(text):
+        try:
+            dt = datetime(int(ts[0:4]), int(ts[4:6]), int(ts[6:8]), int(ts[8:10]), int(ts[10:12]), int(ts[12:14]))
+        except ValueError:
+            continue  # 14 digits but not a real date/time
+        alerts.append(ParsedAlert(symbol, float(price), float(sma20), float(ema20), float(ema9), dt, int(alert_id)))
+    return alerts
@@ -1,18 +1,25 @@
 # build_assets.py  (place this file in the same folder as: stocks.py, stock_config.py, trade_asset.py)
 from __future__ import annotations
+import inspect
 import os
-from typing import List, Optional
-from dotenv import load_dotenv
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
 
 # ---- direct imports (adjust if your files are in a package) ----
 from stocks import Stock
 from stock_config import StockConfig
 from trade_asset import DayTradeAsset
+from env_utils import ensure_env_loaded
 
 # ---- env helpers ----
-def _getenv_any(keys: List[str], default: Optional[str] = None) -> Optional[str]:
+def _env_snapshot() -> Dict[str, str]:
+    # one copy of os.environ per build; every symbol's fallback keys are then plain dict lookups
+    return dict(os.environ)
+
+def _getenv_any(keys: List[str], default: Optional[str] = None, env: Optional[Mapping[str, str]] = None) -> Optional[str]:
+    if env is None: env = os.environ
     for k in keys:
-        v = os.getenv(k)
+        v = env.get(k)
         if v not in (None, ""): return v
     return default
 
@@ -28,31 +35,55 @@ def _as_bool(v: Optional[str], default: Optional[bool] = None) -> Optional[bool]
     if v is None: return default
     return v.strip().lower() in {"1","true","yes","y","on"}
 
+@lru_cache(maxsize=None)
+def _setter_for(cls: type, name: str) -> Tuple[Optional[Callable], bool]:
+    """
+    Resolved once per (class, field): the unbound `set_<name>` if it can take a single value
+    (StockConfig has zero-arg overloads of some setters), and whether the class itself has `name`.
+    """
+    setter = getattr(cls, f"set_{name}", None)
+    if callable(setter):
+        try: inspect.signature(setter).bind(None, None)  # (self, value)
+        except (TypeError, ValueError): setter = None
+    else:
+        setter = None
+    return setter, hasattr(cls, name)
+
 def _apply(obj, name: str, value) -> None:
     if value is None: return
-    setter = getattr(obj, f"set_{name}", None)
-    if callable(setter):
-        try: setter(value); return
+    setter, on_class = _setter_for(type(obj), name)
+    if setter is not None:
+        try: setter(obj, value); return
         except Exception: pass
-    if hasattr(obj, name):
+    if on_class or name in getattr(obj, "__dict__", ()):
         try: setattr(obj, name, value)
         except Exception: pass
 
 # ---- build StockConfig from .env for a symbol ----
-def make_stock_config_from_env(symbol: str) -> StockConfig:
+def _config_values_from_env(symbol: str, env: Optional[Mapping[str, str]] = None) -> Dict[str, Any]:
+    """All per-symbol settings in one pass over `env` (a snapshot of os.environ by default)."""
+    if env is None: env = _env_snapshot()
     s = symbol.upper()
 
-    broker  = _getenv_any([f"BROKER_{s}", "BROKER"])
-    webhook = _getenv_any([f"WEBHOOK_{s}", "WEBHOOK"]) or (_getenv_any([f"WEBHOOK_{broker.upper()}"]) if broker else None)
+    broker  = _getenv_any([f"BROKER_{s}", "BROKER"], env=env)
+    webhook = _getenv_any([f"WEBHOOK_{s}", "WEBHOOK"], env=env) or (_getenv_any([f"WEBHOOK_{broker.upper()}"], env=env) if broker else None)
+    tags_raw = _getenv_any([f"TAGS_{s}", "TAGS"], env=env)
+
+    return {
+        "broker":         broker,
+        "webhook":        webhook,
+        "qty":            _as_int(_getenv_any([f"QTY_{s}", f"{s}_QTY", "DEFAULT_QTY"], env=env)),
+        "risk_per_trade": _as_float(_getenv_any([f"RISK_PER_TRADE_{s}", "RISK_PER_TRADE"], env=env)),
+        "max_loss_trade": _as_float(_getenv_any([f"MAX_LOSS_PER_TRADE_{s}", "MAX_LOSS_PER_TRADE"], env=env)),
+        "tif":            _getenv_any([f"TIF_{s}", "TIF"], env=env),
+        "price_policy":   _getenv_any([f"PRICE_POLICY_{s}", "PRICE_POLICY"], env=env),
+        "tags":           [t.strip() for t in tags_raw.split(",") if t.strip()] if tags_raw else None,
+        "notes":          _getenv_any([f"NOTES_{s}", "NOTES"], env=env),
+        "blocked":        _as_bool(_getenv_any([f"BLOCKED_{s}", "BLOCKED"], env=env)),
+    }
 
-    qty            = _as_int(_getenv_any([f"QTY_{s}", f"{s}_QTY", "DEFAULT_QTY"]))
-    risk_per_trade = _as_float(_getenv_any([f"RISK_PER_TRADE_{s}", "RISK_PER_TRADE"]))
-    max_loss_trade = _as_float(_getenv_any([f"MAX_LOSS_PER_TRADE_{s}", "MAX_LOSS_PER_TRADE"]))
-    tif           = _getenv_any([f"TIF_{s}", "TIF"])
-    price_policy  = _getenv_any([f"PRICE_POLICY_{s}", "PRICE_POLICY"])
-    tags_raw      = _getenv_any([f"TAGS_{s}", "TAGS"])
-    notes         = _getenv_any([f"NOTES_{s}", "NOTES"])
-    blocked       = _as_bool(_getenv_any([f"BLOCKED_{s}", "BLOCKED"]))
+def _stock_config_from_values(symbol: str, v: Dict[str, Any]) -> StockConfig:
+    broker, webhook = v["broker"], v["webhook"]
 
     # Try common ctor shapes
     try:
@@ -65,35 +96,40 @@ def make_stock_config_from_env(symbol: str) -> StockConfig:
             _apply(cfg, "sym", symbol); _apply(cfg, "symbol", symbol)
             _apply(cfg, "broker_name", broker); _apply(cfg, "webhook", webhook)
 
+    qty = v["qty"]
     _apply(cfg, "default_qty", qty); _apply(cfg, "qty", qty)
-    _apply(cfg, "risk_per_trade", risk_per_trade)
-    _apply(cfg, "max_loss_per_trade", max_loss_trade)
-    _apply(cfg, "tif", tif)
-    for pp in ("opt_price_policy", "price_policy"): _apply(cfg, pp, price_policy)
-    if tags_raw: _apply(cfg, "tags", [t.strip() for t in tags_raw.split(",") if t.strip()])
-    _apply(cfg, "notes", notes)
-    _apply(cfg, "is_blocked", blocked); _apply(cfg, "is_bocked", blocked)
+    _apply(cfg, "risk_per_trade", v["risk_per_trade"])
+    _apply(cfg, "max_loss_per_trade", v["max_loss_trade"])
+    _apply(cfg, "tif", v["tif"])
+    for pp in ("opt_price_policy", "price_policy"): _apply(cfg, pp, v["price_policy"])
+    _apply(cfg, "tags", v["tags"])
+    _apply(cfg, "notes", v["notes"])
+    _apply(cfg, "is_blocked", v["blocked"]); _apply(cfg, "is_bocked", v["blocked"])
     return cfg
 
+def make_stock_config_from_env(symbol: str) -> StockConfig:
+    return _stock_config_from_values(symbol, _config_values_from_env(symbol))
+
 # ---- factory: build assets from list of symbols ----
 def create_day_trade_assets(symbols: List[str]) -> List[DayTradeAsset]:
-    load_dotenv()
+    ensure_env_loaded()
+    env = _env_snapshot()
     assets: List[DayTradeAsset] = []
     for sym in symbols:
-        cfg = make_stock_config_from_env(sym)
+        values = _config_values_from_env(sym, env)
+        cfg = _stock_config_from_values(sym, values)
         try:
             stock = Stock(symbol=sym)
         except TypeError:
             try: stock = Stock(sym=sym)
             except TypeError: stock = Stock(sym)  # positional
         asset = DayTradeAsset(stock=stock, config=cfg)
-        qty = _as_int(_getenv_any([f"QTY_{sym.upper()}", f"{sym.upper()}_QTY", "DEFAULT_QTY"]))
-        _apply(asset, "qty", qty)
+        _apply(asset, "qty", values["qty"])  # same keys the config already read
         assets.append(asset)
     return assets
 
 def symbols_from_env() -> List[str]:
-    load_dotenv()
+    ensure_env_loaded()
     raw = os.getenv("SYMBOLS")
     return [s.strip().upper() for s in raw.split(",")] if raw else []
 
@@ -0,0 +1,51 @@
+# criteria_core.py
+# Numeric cores of stream_trader's criteria: plain scalar comparisons, one int tag out, so the wrappers
+# only build the TradeSignal.
+#
+# Trends are codes (1 up, -1 down, 0 neutral). Each core returns one int tag = action * 3 + (trend + 1),
+# with action HOLD=0, BUY_CALL=1, BUY_PUT=2, EXIT=3; unpack with decode().
+HOLD, BUY_CALL, BUY_PUT, EXIT = 0, 1, 2, 3
+ACTIONS = ("HOLD", "BUY_CALL", "BUY_PUT", "EXIT")
+
+def stacked(price, ema9, ema20, sma20, prev):
+    """Stacked MAs; `prev` is the last up/down trend code (0 if none). EXIT on any change from it."""
+    trend = 0
+    if ema9 > ema20 and ema20 > sma20 and price >= ema9:
+        trend = 1
+    elif ema9 < ema20 and ema20 < sma20 and price <= ema9:
+        trend = -1
+    return stacked_action(trend, prev)
+
+def stacked_action(trend, prev):
+    """stacked's decision for an already derived trend code (derive_trend's result, coded)."""
+    if prev != 0 and trend != prev:
+        action = EXIT
+    elif trend == 1:
+        action = BUY_CALL
+    elif trend == -1:
+        action = BUY_PUT
+    else:
+        action = HOLD
+    return action * 3 + trend + 1
+
+def crossover(price, ema9, ema20, sma20, ema9_prev, ema20_prev, has_prev, prev):
+    """EMA9/EMA20 cross filtered by SMA20; `has_prev` = 0 when there is no previous bar yet."""
+    bullish = ema9 > ema20 and price >= sma20
+    bearish = ema9 < ema20 and price <= sma20
+    crossed_up = has_prev != 0 and ema9_prev <= ema20_prev and ema9 > ema20
+    crossed_dn = has_prev != 0 and ema9_prev >= ema20_prev and ema9 < ema20
+    trend = 1 if bullish else (-1 if bearish else 0)
+    if crossed_up and bullish:
+        action = BUY_CALL
+    elif crossed_dn and bearish:
+        action = BUY_PUT
+    elif (prev == 1 and bearish) or (prev == -1 and bullish):
+        action = EXIT
+    else:
+        action = HOLD
+    return action * 3 + trend + 1
+
+def decode(tag):
+    """tag -> (action name, trend code)"""
+    action, t = divmod(tag, 3)
+    return ACTIONS[action], t - 1
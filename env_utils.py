@@ -1,9 +1,25 @@
 # env_utils.py
 import os
+from typing import Dict, Optional, Set
 from dotenv import load_dotenv
 
+# Env vars don't change during a run, so cache lookups (misses included, as None)
+_ENV_CACHE: Dict[str, Optional[str]] = {}
+_LOADED_DOTENVS: Set[Optional[str]] = set()
+
+def ensure_env_loaded(dotenv_path: Optional[str] = None) -> None:
+    """
+    load_dotenv() at most once per file for the whole process; modules call this instead of
+    load_dotenv() so .env isn't re-parsed by every importer. None means python-dotenv's own lookup.
+    """
+    key = os.path.abspath(dotenv_path) if dotenv_path else None
+    if key in _LOADED_DOTENVS: return
+    load_dotenv(dotenv_path=dotenv_path)
+    _LOADED_DOTENVS.add(key)
+    _ENV_CACHE.clear()  # a new file may define keys we cached as missing
+
 # Load .env once, on first import
-load_dotenv()
+ensure_env_loaded()
 
 def get_env_value(key: str) -> str:
     """
@@ -11,7 +27,14 @@ def get_env_value(key: str) -> str:
     Raises KeyError if not found.
     """
     upper_key = key.upper()
-    val = os.getenv(upper_key)
+    try:
+        val = _ENV_CACHE[upper_key]
+    except KeyError:
+        val = _ENV_CACHE[upper_key] = os.getenv(upper_key)
     if val is None:
         raise KeyError(f"Environment variable '{upper_key}' not found.")
     return val
+
+def invalidate_env_cache() -> None:
+    """Forget cached lookups, e.g. after reloading .env or patching os.environ."""
+    _ENV_CACHE.clear()
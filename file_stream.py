@@ -1,85 +1,150 @@
 # file_stream.py
-import asyncio, os, contextlib
+import asyncio, os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import AsyncIterator, Dict, List, Optional
-from alert_parser import parse_alert_line, ParsedAlert
+from alert_parser import parse_alert_lines, ParsedAlert
+
+try:
+    # optional: event-driven tailing via Linux inotify; falls back to stat() polling
+    from asyncinotify import Inotify, Mask
+except ImportError:
+    Inotify = Mask = None
+
+_POLL_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix="file-poll")  # stat()/read()s of the polling path
 
 class FileTailer:
     def __init__(self, filepath: str, symbol: str):
         self.filepath = filepath
         self.symbol = symbol
         self._pos: int = 0                      # how far we've read (byte offset)
+        self._ino: Optional[int] = None           # inode we're reading (detects replace/rotation)
         self._last_ts: Optional[datetime] = None  # last timestamp processed (dedupe)
 
+    def _start_at_eof(self) -> None:
+        # start at EOF (tail-only). A file that shows up later is read from the start.
+        try:
+            st = os.stat(self.filepath)
+            self._pos, self._ino = st.st_size, st.st_ino
+        except FileNotFoundError:
+            self._pos, self._ino = 0, None
+
+    def _drain(self) -> List[ParsedAlert]:
+        """Read complete lines appended since the last call: one stat(), plus one open() only when the file grew."""
+        try:
+            st = os.stat(self.filepath)
+        except FileNotFoundError:
+            # ok during rotation; wait for file to reappear
+            return []
+
+        # file truncated/rotated → restart from beginning
+        if st.st_ino != self._ino or st.st_size < self._pos:
+            self._pos, self._ino = 0, st.st_ino
+        if st.st_size <= self._pos:
+            return []
+
+        # new content appended → read delta from _pos to EOF
+        with open(self.filepath, "rb") as f:
+            f.seek(self._pos)
+            chunk = f.read()
+        end = chunk.rfind(b"\n") + 1
+        if end == 0:
+            return []  # writer is mid-line; pick it up on the next change
+        self._pos += end
+
+        alerts: List[ParsedAlert] = []
+        for alert in parse_alert_lines(chunk[:end].decode("utf-8", errors="ignore")):
+            if alert.symbol == self.symbol:
+                # optional dedupe by timestamp
+                if self._last_ts is None or alert.ts > self._last_ts:
+                    self._last_ts = alert.ts
+                    alerts.append(alert)
+        return alerts
+
     async def follow(self, poll_sec: float = 0.25) -> AsyncIterator[ParsedAlert]:
-        # start at EOF (tail-only). Use 0 to backfill.
-        if os.path.exists(self.filepath):
-            self._pos = os.path.getsize(self.filepath)
-        else:
-            while not os.path.exists(self.filepath):
-                await asyncio.sleep(poll_sec)
-            self._pos = os.path.getsize(self.filepath)
+        self._start_at_eof()
+        if Inotify is not None:
+            async for alert in self._follow_events():
+                yield alert
+            return
 
         while True:
-            try:
-                size = os.path.getsize(self.filepath)
-
-                # file truncated/rotated → restart from beginning
-                if size < self._pos:
-                    self._pos = 0
-
-                # new content appended → read delta from _pos to EOF
-                if size > self._pos:
-                    with open(self.filepath, "r", encoding="utf-8") as f:
-                        f.seek(self._pos)
-                        for line in f:
-                            alert = parse_alert_line(line)
-                            if alert and alert.symbol == self.symbol:
-                                # optional dedupe by timestamp
-                                if self._last_ts is None or alert.ts > self._last_ts:
-                                    self._last_ts = alert.ts
-                                    yield alert
-                        # advance our cursor to current EOF
-                        self._pos = f.tell()
-
-            except FileNotFoundError:
-                # ok during rotation; wait for file to reappear
-                pass
-
+            for alert in self._drain():
+                yield alert
             # pacing (latency vs CPU tradeoff)
             await asyncio.sleep(poll_sec)
 
-async def merged_file_stream(symbol_to_path: Dict[str, str]) -> AsyncIterator[List[ParsedAlert]]:
-    tailers = [FileTailer(path, sym) for sym, path in symbol_to_path.items()]
-    queues = {t.symbol: asyncio.Queue() for t in tailers}
+    async def _follow_events(self) -> AsyncIterator[ParsedAlert]:
+        # watch the directory, not the file, so creation and rotation are seen too
+        name = os.path.basename(self.filepath)
+        with Inotify() as ino:
+            ino.add_watch(os.path.dirname(os.path.abspath(self.filepath)),
+                          Mask.MODIFY | Mask.CREATE | Mask.MOVED_TO)
+            for alert in self._drain():  # anything written before the watch was armed
+                yield alert
+            async for event in ino:
+                if event.name is not None and event.name.name == name:
+                    for alert in self._drain():
+                        yield alert
 
-    async def pump(tailer: FileTailer):
-        async for alert in tailer.follow():
-            await queues[tailer.symbol].put(alert)
+def _tailer_for(by_dir: Dict[str, Dict[str, FileTailer]], event) -> Optional[FileTailer]:
+    watch = event.watch
+    if watch is None or event.name is None:
+        return None  # watch gone (directory removed) or an event on the directory itself
+    return by_dir.get(str(watch.path), {}).get(event.name.name)
 
-    tasks = [asyncio.create_task(pump(t)) for t in tailers]
+async def _merged_events(tailers: List[FileTailer]) -> AsyncIterator[List[ParsedAlert]]:
+    """
+    All tailers on one inotify instance: one fd and one watch per directory, so each write wakes
+    the stream once (not once per tailer) and only the files named in the events are drained.
+    """
+    by_dir: Dict[str, Dict[str, FileTailer]] = {}
+    for t in tailers:
+        t._start_at_eof()
+        by_dir.setdefault(os.path.dirname(os.path.abspath(t.filepath)), {})[os.path.basename(t.filepath)] = t
 
-    try:
+    # sync_timeout=0: sync_get() returns what is already readable and None instead of waiting
+    with Inotify(sync_timeout=0) as ino:
+        for d in by_dir:
+            ino.add_watch(d, Mask.MODIFY | Mask.CREATE | Mask.MOVED_TO)
+        batch = [a for t in tailers for a in t._drain()]  # anything written before the watches were armed
+        if batch:
+            yield batch
         while True:
-            batch: List[ParsedAlert] = []
-
-            # drain all ready items across all symbols, non-blocking
-            for sym, q in queues.items():
-                try:
-                    while True:
-                        batch.append(q.get_nowait())
-                        q.task_done()
-                except asyncio.QueueEmpty:
-                    pass
-
+            dirty: Dict[FileTailer, None] = {}  # changed tailers in event order, each drained once
+            event = await ino.get()
+            while event is not None:
+                t = _tailer_for(by_dir, event)
+                if t is not None: dirty[t] = None
+                event = ino.sync_get()
+            batch = [a for t in dirty for a in t._drain()]
             if batch:
                 yield batch
 
-            await asyncio.sleep(0.1)
+def _drain_all(tailers: List[FileTailer]) -> List[ParsedAlert]:
+    return [a for t in tailers for a in t._drain()]
 
+async def _merged_polls(tailers: List[FileTailer], poll_sec: float) -> AsyncIterator[List[ParsedAlert]]:
+    """
+    stat() polling for all tailers from one task: each tick is one call on the poll thread that drains
+    them all in order, so the loop never blocks on file I/O and there is one timer per tick, not one per
+    tailer. Not fanned out per file: a local stat() + read is far cheaper than a thread hand-off.
+    """
+    loop = asyncio.get_running_loop()
+    for t in tailers:
+        t._start_at_eof()
+    while True:
+        batch = await loop.run_in_executor(_POLL_POOL, _drain_all, tailers)
+        if batch:
+            yield batch
+        # pacing (latency vs CPU tradeoff)
+        await asyncio.sleep(poll_sec)
+
+async def merged_file_stream(symbol_to_path: Dict[str, str], poll_sec: float = 0.25) -> AsyncIterator[List[ParsedAlert]]:
+    tailers = [FileTailer(path, sym) for sym, path in symbol_to_path.items()]
+    merged = _merged_events(tailers) if Inotify is not None else _merged_polls(tailers, poll_sec)
+    try:
+        async for batch in merged:
+            yield batch
     finally:
-        # ensure tailer tasks are cancelled cleanly
-        for t in tasks:
-            t.cancel()
-            with contextlib.suppress(asyncio.CancelledError):
-                await t
+        await merged.aclose()
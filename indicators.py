@@ -1,28 +1,63 @@
 from dataclasses import dataclass, field
-from collections import deque
 from datetime import datetime
-from typing import Deque, Optional, Iterable
+from typing import Optional, Tuple
+import numpy as np
 
 @dataclass
 class IndicatorSeries:
+    """
+    Fixed-size ring buffer backed by NumPy arrays.
+    Every value is written twice (slot and slot+maxlen), so the newest `len` values are always
+    one contiguous slice: `values`/`last_n()` return zero-copy views, oldest first.
+    """
     maxlen: int = 200
-    values: Deque[float] = field(default_factory=lambda: deque(maxlen=200))
-    timestamps: Deque[datetime] = field(default_factory=lambda: deque(maxlen=200))
+    _buf: np.ndarray = field(init=False, repr=False)
+    _ts_buf: np.ndarray = field(init=False, repr=False)
+    _head: int = field(default=0, init=False, repr=False)
+    _count: int = field(default=0, init=False, repr=False)
+    _version: int = field(default=0, init=False, repr=False)  # bumped on every update
+
+    def __post_init__(self) -> None:
+        self._buf = np.zeros(2 * self.maxlen, dtype=np.float64)
+        self._ts_buf = np.empty(2 * self.maxlen, dtype=object)  # keeps the datetime objects as-is
+
+    def __len__(self) -> int:
+        return self._count
 
     def update(self, value: float, ts: datetime) -> None:
-        self.values.append(value)
-        self.timestamps.append(ts)
+        h = self._head
+        self._buf[h] = self._buf[h + self.maxlen] = value
+        self._ts_buf[h] = self._ts_buf[h + self.maxlen] = ts
+        self._head = (h + 1) % self.maxlen
+        if self._count < self.maxlen: self._count += 1
+        self._version += 1
+
+    @property
+    def version(self) -> int:
+        """Number of updates so far; unchanged version = unchanged contents."""
+        return self._version
+
+    @property
+    def values(self) -> np.ndarray:
+        end = self._head + self.maxlen
+        return self._buf[end - self._count:end]
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        end = self._head + self.maxlen
+        return self._ts_buf[end - self._count:end]
 
     def current(self) -> Optional[float]:
-        return self.values[-1] if self.values else None
+        return float(self._buf[self._head + self.maxlen - 1]) if self._count else None
 
     def prev(self, n: int = 1) -> Optional[float]:
-        if n <= 0 or n > len(self.values): return None
-        return list(self.values)[-n-0]
+        if n <= 0 or n > self._count: return None
+        return float(self._buf[self._head + self.maxlen - n])
 
-    def last_n(self, n: int) -> Iterable[float]:
-        if n <= 0: return []
-        return list(self.values)[-n:]
+    def last_n(self, n: int) -> np.ndarray:
+        if n <= 0: return self._buf[:0]
+        end = self._head + self.maxlen
+        return self._buf[end - min(n, self._count):end]
 
 @dataclass
 class Indicator:
@@ -31,3 +66,14 @@ class Indicator:
     sma20: IndicatorSeries = field(default_factory=lambda: IndicatorSeries(maxlen=2048))
     ema20: IndicatorSeries = field(default_factory=lambda: IndicatorSeries(maxlen=2048))
     ema9: IndicatorSeries  = field(default_factory=lambda: IndicatorSeries(maxlen=2048))
+
+    @property
+    def version(self) -> int:
+        """Grows whenever any of the series is updated (for caching values derived from them)."""
+        return self.price._version + self.sma20._version + self.ema20._version + self.ema9._version
+
+    def prev_pair(self) -> Tuple[Optional[float], Optional[float]]:
+        """(ema9, ema20) one bar back, read from the ring buffers; (None, None) before the second bar."""
+        e9, e20 = self.ema9.prev(2), self.ema20.prev(2)
+        if e9 is None or e20 is None: return None, None
+        return e9, e20
@@ -0,0 +1,73 @@
+# ma_alert_regex.py
+# The TradingView "MA Alert" line format, compiled once and shared by price_alerts and alert_parser.
+import re
+from functools import lru_cache
+from typing import Optional, Tuple
+
+try:
+    # optional: google-re2 (linear-time DFA matching); same match API as re
+    import re2
+except ImportError:
+    re2 = None
+
+# Example line:
+# CRCL - MA Alert - 1 - price: 139.00 - SMA_20: 140.80,  EMA_20: 141.12, EMA_9: 138.78 - 20250815040103
+_SYMBOL = r"[A-Z]+(?:\.[A-Z]+)?"
+NUM = r"-?\d+(?:\.\d+)?"  # not [\d.]+: '1.2.3' must not reach float()
+
+# The exact format TradingView sends: literal separators, so sre mostly runs fixed-string compares
+# (~25% faster per line than the loose form). Only the padding before EMA_20 varies.
+_EXACT_FIELDS = (
+    rf" - MA Alert - (?P<alert>\d+) - price: (?P<price>{NUM}) - "
+    rf"SMA_20: (?P<sma20>{NUM}), +EMA_20: (?P<ema20>{NUM}), EMA_9: (?P<ema9>{NUM}) - (?P<timestamp>\d{{14}})"
+)
+PATTERN = re.compile(f"^(?P<symbol>{_SYMBOL})" + _EXACT_FIELDS + "$")
+
+_FIELDS = (  # everything after the symbol, any spacing around the separators
+    r"\s*-\s*MA\s+Alert\s*-\s*(?P<alert>\d+)\s*-\s*"
+    rf"price:\s*(?P<price>{NUM})\s*-\s*"
+    rf"SMA_20:\s*(?P<sma20>{NUM}),\s*EMA_20:\s*(?P<ema20>{NUM}),\s*EMA_9:\s*(?P<ema9>{NUM})"
+    r"\s*-\s*(?P<timestamp>\d{14})"
+)
+# fallback for hand-edited / re-spaced lines
+LOOSE_PATTERN = re.compile(f"^(?P<symbol>{_SYMBOL})" + _FIELDS + "$")
+
+# LOOSE_PATTERN over many lines at once (a message body, a file chunk): MULTILINE anchors, [ \t] so no
+# match runs across lines, surrounding blanks (and a CRLF's \r) allowed and left out of the groups
+LINES_PATTERN = re.compile(
+    r"^[ \t]*" + LOOSE_PATTERN.pattern[1:-1].replace(r"\s", r"[ \t]") + r"[ \t\r]*$", re.MULTILINE
+)
+
+# Symbol-only scan of a whole file (bytes, MULTILINE): one capture group, the exact separators tried
+# before the loose ones, no match across lines; surrounding blanks and a CRLF's \r allowed.
+def _no_groups(p: str) -> str: return re.sub(r"\(\?P<\w+>", "(?:", p)
+SYMBOL_SCAN = re.compile(
+    (rf"^[ \t]*({_SYMBOL})(?:" + _no_groups(_EXACT_FIELDS) + "|"
+     + _no_groups(_FIELDS).replace(r"\s", r"[ \t]") + r")[ \t\r]*$").encode(),
+    re.MULTILINE,
+)
+
+_exact = (re2.compile(PATTERN.pattern) if re2 is not None else PATTERN).match
+_loose = (re2.compile(LOOSE_PATTERN.pattern) if re2 is not None else LOOSE_PATTERN).match
+
+def match_line(line: str):
+    """Match one stripped line: exact format first, loose spacing only if that fails."""
+    return _exact(line) or _loose(line)
+
+# compiled per-symbol patterns are cached, so repeated lookups skip re.compile
+@lru_cache(maxsize=512)
+def build_ma_alert_pattern(symbol: str) -> re.Pattern:
+    sym = re.escape(symbol)  # handles dots like BRK.B
+    return re.compile(f"^(?P<symbol>{sym})" + _FIELDS + "$")
+
+# ---- fields of one line ----
+def parse_fields(line: str) -> Optional[Tuple[str, int, float, float, float, float, str]]:
+    """
+    (symbol, alert, price, sma20, ema20, ema9, raw 14-digit ts) of one stripped line, or None.
+    Positional groups() unpacking off the literal-separator PATTERN beats splitting on " - " in
+    Python (str.split + prefix checks + per-field validation); NUM already guarantees float() works.
+    """
+    m = _exact(line) or _loose(line)
+    if m is None: return None
+    sym, alert, price, sma20, ema20, ema9, ts = m.groups()
+    return sym, int(alert), float(price), float(sma20), float(ema20), float(ema9), ts
@@ -1,72 +1,41 @@
+import asyncio
 import imaplib
+import itertools
 import email
-from datetime import datetime
+from email.parser import BytesParser
+from email.policy import compat32
+from datetime import date, datetime
 import time
 import os
 import re
-from dotenv import load_dotenv
-from typing import Optional, List, Set   # ← NEW
+import select
+import socket
+import ssl
+import sqlite3
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Optional, List, Set, Dict, Tuple   # ← NEW
 from indicators import Indicator, IndicatorSeries
+import price_shm
+from env_utils import ensure_env_loaded
+from ma_alert_regex import LINES_PATTERN, PATTERN, build_ma_alert_pattern, parse_fields
+
+try:
+    # optional: Hyperscan (SIMD multi-pattern matcher) locates alert lines in a whole body in one pass
+    import hyperscan
+except ImportError:
+    hyperscan = None
 
 # ──────────────────────────────────────────────────────────────────────────────
 # CONSTANTS & REGEX
 # ──────────────────────────────────────────────────────────────────────────────
-DASH = r'[–-]'
-PRICE = r'\d+(?:\.\d+)?'
-TIMESTAMP = r'\d{14}'
-# pattern = re.compile(
-#     rf"""^
-#         (?P<symbol>[A-Z]+(?:\.[A-Z]+)?)
-#         \s*{DASH}\s*Renko\s*{DASH}\s*
-#         {PRICE}\s*{DASH}\s*
-#         {TIMESTAMP}
-#         $""",
-#     re.VERBOSE,
-# )
-
-# pattern = re.compile(
-#     r"""
-#     ^
-#     (?P<symbol>TSLA)\s*-\s*MA\s+Alert\s*-\s*(?P<alert>\d+)\s*-\s*
-#     price:\s*(?P<price>-?\d+(?:\.\d+)?)
-#     \s*-\s*
-#     SMA_20:\s*(?P<sma20>-?\d+(?:\.\d+)?),\s*EMA_20:\s*(?P<ema20>-?\d+(?:\.\d+)?),\s*EMA_9:\s*(?P<ema9>-?\d+(?:\.\d+)?)
-#     \s*-\s*
-#     (?P<timestamp>\d{14})
-#     $
-#     """,
-#     re.VERBOSE,
-# )
-
-pattern = re.compile(
-    r"""
-    ^
-    (?P<symbol>[A-Z]+(?:\.[A-Z]+)?)\s*-\s*MA\s+Alert\s*-\s*(?P<alert>\d+)\s*-\s*
-    price:\s*(?P<price>-?\d+(?:\.\d+)?)
-    \s*-\s*
-    SMA_20:\s*(?P<sma20>-?\d+(?:\.\d+)?),\s*EMA_20:\s*(?P<ema20>-?\d+(?:\.\d+)?),\s*EMA_9:\s*(?P<ema9>-?\d+(?:\.\d+)?)
-    \s*-\s*
-    (?P<timestamp>\d{14})
-    $
-    """,
-    re.VERBOSE | re.IGNORECASE,
-)
-
-def build_ma_alert_pattern(symbol: str) -> re.Pattern:
-    sym = re.escape(symbol)  # handles dots like BRK.B
-    return re.compile(
-        rf"""
-        ^
-        (?P<symbol>{sym})\s*-\s*MA\s+Alert\s*-\s*(?P<alert>\d+)\s*-\s*
-        price:\s*(?P<price>-?\d+(?:\.\d+)?)
-        \s*-\s*
-        SMA_20:\s*(?P<sma20>-?\d+(?:\.\d+)?),\s*EMA_20:\s*(?P<ema20>-?\d+(?:\.\d+)?),\s*EMA_9:\s*(?P<ema9>-?\d+(?:\.\d+)?)
-        \s*-\s*
-        (?P<timestamp>\d{14})
-        $
-        """,
-        re.VERBOSE,
-    )
+# the shared line pattern (ma_alert_regex.PATTERN, also used by alert_parser); name kept for callers
+pattern = PATTERN
+# LOOSE_PATTERN for a whole message body (shared with alert_parser's file-chunk parsing)
+_body_re = LINES_PATTERN
 
 # pattern = build_ma_alert_pattern("SPX")
 
@@ -75,83 +44,417 @@ def build_ma_alert_pattern(symbol: str) -> re.Pattern:
 IMAP_SERVER   = "imap.gmail.com"
 SENDER_EMAIL  = "noreply@tradingview.com"
 POLL_INTERVAL = 1
-processed_uids: Set[str] = set()
+IDLE_TIMEOUT  = 29 * 60    # re-issue IDLE before the server's 30 min cutoff (RFC 2177)
+IDLE_CHECK    = 1.0        # seconds between checks of the stop event while idling
+USE_SHARED_MEMORY  = True   # publish/read latest values via price_shm (see price_shm.py)
+WRITE_SYMBOL_FILES = True   # keep writing <SYMBOL>_price_<YYYYMMDD>.txt (audit trail, file tailers)
+WRITE_INTERVAL     = 0.1    # seconds between batched appends by the file-writer task
+PROCESSED_DB       = "processed_uids.db"  # (date, uid) of handled mails, survives restarts
+MAX_PROCESSED_UIDS = 10_000 # in-memory cache in front of PROCESSED_DB
+MAX_FETCH_ATTEMPTS = 3      # a UID still missing from this many FETCH replies is logged and skipped
+
+class RecentSet:
+    """
+    Set with LRU eviction past `maxlen`. A hit refreshes the entry, so ids the mailbox search keeps
+    returning are never evicted; only ids that stopped showing up age out.
+    """
+    def __init__(self, maxlen: int):
+        self.maxlen = maxlen
+        self._items: "OrderedDict[str, None]" = OrderedDict()
+
+    def __contains__(self, key: str) -> bool:
+        if key in self._items:
+            self._items.move_to_end(key)
+            return True
+        return False
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def add(self, key: str) -> None:
+        self._items[key] = None
+        self._items.move_to_end(key)
+        if len(self._items) > self.maxlen:
+            self._items.popitem(last=False)
+
+class ProcessedUids:
+    """
+    Handled (date, uid) pairs in a small sqlite table, fronted by a RecentSet, so a restart doesn't
+    re-parse the day's mails and memory stays bounded. The db is opened on first use, not on import.
+    """
+    def __init__(self, path: str = PROCESSED_DB, cache_size: int = MAX_PROCESSED_UIDS):
+        self.path = path
+        self._recent = RecentSet(cache_size)
+        self._db: Optional[sqlite3.Connection] = None
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            self._db = sqlite3.connect(self.path)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")  # one cheap commit per mail
+            self._db.execute("CREATE TABLE IF NOT EXISTS seen(date TEXT, uid TEXT, PRIMARY KEY(date, uid))")
+        return self._db
+
+    def seen(self, date: str, uid: str) -> bool:
+        key = f"{date}:{uid}"
+        if key in self._recent: return True
+        if self._conn().execute("SELECT 1 FROM seen WHERE date=? AND uid=?", (date, uid)).fetchone():
+            self._recent.add(key)
+            return True
+        return False
+
+    def add(self, date: str, uid: str) -> None:
+        with self._conn():
+            self._conn().execute("INSERT OR IGNORE INTO seen(date, uid) VALUES (?, ?)", (date, uid))
+        self._recent.add(f"{date}:{uid}")
+
+processed_uids = ProcessedUids()
 
 # ──────────────────────────────────────────────────────────────────────────────
 # AUTHENTICATION
 # ──────────────────────────────────────────────────────────────────────────────
-load_dotenv()
+ensure_env_loaded()
 username = os.getenv("GMAIL_USERNAME")
 password = os.getenv("GMAIL_PASSWORD")
 
 def connect_to_mailbox() -> imaplib.IMAP4_SSL:
     imap = imaplib.IMAP4_SSL(IMAP_SERVER)
+    # the session now idles for up to IDLE_TIMEOUT; keepalive lets the OS notice a dead peer
+    imap.socket().setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
     imap.login(username, password)
     return imap
 
 # ──────────────────────────────────────────────────────────────────────────────
 # EMAIL-FETCH HELPERS
 # ──────────────────────────────────────────────────────────────────────────────
+_today: Tuple[Optional[date], str] = (None, "")
+
+def _today_suffix() -> str:
+    """Today's YYYYMMDD; re-formatted only when the calendar day changes, not on every poll."""
+    global _today
+    d = date.today()
+    if d != _today[0]:
+        _today = (d, d.strftime("%Y%m%d"))
+    return _today[1]
+
+@lru_cache(maxsize=4)
+def _imap_date(date_yyyymmdd: str) -> Optional[str]:
+    # YYYYMMDD -> DD-Mon-YYYY for SEARCH ON; a handful of days is all a monitor ever asks for
+    try:
+        return datetime.strptime(date_yyyymmdd, "%Y%m%d").strftime("%d-%b-%Y")
+    except ValueError:
+        return None
+
 def _search_date_clause(date_yyyymmdd: Optional[str] = None) -> str:   # ← CHANGED
     if date_yyyymmdd:
-        try:
-            dt = datetime.strptime(date_yyyymmdd, "%Y%m%d")
-        except ValueError:
-            print(f"[WARN] Bad date '{date_yyyymmdd}', defaulting to today.")
-            dt = datetime.now()
-    else:
-        dt = datetime.now()
-    return dt.strftime("%d-%b-%Y")
+        clause = _imap_date(date_yyyymmdd)
+        if clause is not None:
+            return clause
+        print(f"[WARN] Bad date '{date_yyyymmdd}', defaulting to today.")
+    return _imap_date(_today_suffix())
 
 def fetch_email_uids(
     imap: imaplib.IMAP4_SSL,
-    date_yyyymmdd: Optional[str] = None        # ← CHANGED
+    date_yyyymmdd: Optional[str] = None,       # ← CHANGED
+    after_uid: Optional[int] = None,
 ) -> List[bytes]:                              # ← CHANGED
-    imap.select("inbox")
+    """UIDs of the day's alert mails; with `after_uid`, only those above it (incremental search)."""
+    if imap.state != "SELECTED":
+        imap.select("inbox")
     search_date = _search_date_clause(date_yyyymmdd)
-    status, data = imap.search(None, f'(FROM "{SENDER_EMAIL}" ON {search_date})')
+    criteria = f'FROM "{SENDER_EMAIL}" ON {search_date}'
+    if after_uid is not None:
+        criteria += f" UID {after_uid + 1}:*"
+    # UID SEARCH: UIDs stay fixed for a message, unlike sequence numbers (which shift on expunge)
+    status, data = imap.uid("SEARCH", None, f"({criteria})")
     if status != "OK":
         print(f"[ERROR] IMAP search failed: {status}")
         return []
-    return data[0].split()
+    uids = data[0].split()
+    if after_uid is not None:
+        # "n:*" always includes the newest message, even when its UID is below n
+        uids = [u for u in uids if int(u) > after_uid]
+    return uids
+
+_idle_tags = itertools.count(1)  # own IDLE tags: lowercase never collides with imaplib's A-P prefixes
+
+def _input_ready(imap: imaplib.IMAP4_SSL) -> bool:
+    """
+    Without blocking: is response data already in imaplib's buffered reader (or decrypted in the TLS layer,
+    where select() can't see it) or on the socket? The peek fills the same buffer imap.readline() reads.
+    """
+    sock = imap.socket()
+    timeout = sock.gettimeout()
+    sock.setblocking(False)
+    try:
+        return bool(imap.file.peek(1))
+    except (BlockingIOError, ssl.SSLWantReadError):
+        return False
+    finally:
+        sock.settimeout(timeout)
+
+def _idle_line(imap: imaplib.IMAP4_SSL) -> bytes:
+    line = imap.readline()
+    if not line:
+        raise imaplib.IMAP4.abort("connection closed during IDLE")
+    return line
+
+def wait_for_new_mail(
+    imap: imaplib.IMAP4_SSL, timeout: float = IDLE_TIMEOUT, stop: Optional[threading.Event] = None,
+) -> bool:
+    """
+    Park the selected mailbox in IMAP IDLE until the server pushes EXISTS/EXPUNGE, `timeout` passes
+    or `stop` is set (checked every IDLE_CHECK seconds). Returns True if something arrived. Every response, up to the tagged reply to DONE, goes through
+    imap.readline(), so the connection stays in sync for the next SEARCH/FETCH.
+    """
+    tag = b"idle%d" % next(_idle_tags)
+    imap.send(tag + b" IDLE\r\n")
+    if not _idle_line(imap).startswith(b"+"):
+        raise imaplib.IMAP4.error("server refused IDLE")
+
+    sock = imap.socket()
+    pushed = False
+    deadline = time.monotonic() + timeout
+    while not pushed:
+        if not _input_ready(imap):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or (stop is not None and stop.is_set()):
+                break
+            if not select.select([sock], [], [], min(remaining, IDLE_CHECK))[0]:
+                continue
+        line = _idle_line(imap)
+        pushed = line.startswith(b"* ") and line.rstrip().endswith((b"EXISTS", b"EXPUNGE"))
+
+    imap.send(b"DONE\r\n")
+    line = _idle_line(imap)
+    while not line.startswith(tag + b" "):  # untagged responses before the completion
+        line = _idle_line(imap)
+    if not line[len(tag) + 1:].startswith(b"OK"):
+        raise imaplib.IMAP4.error(f"IDLE failed: {line.decode(errors='replace').strip()}")
+    return pushed
+
+_HEADERS_PARSER = BytesParser(policy=compat32)
+
+def _message_text(raw: bytes) -> Optional[str]:
+    """First text/plain part of a raw RFC822 message (the whole payload if not multipart)."""
+    # headers-only parse first: a single-part body is left as-is, no MIME tree gets built
+    msg = _HEADERS_PARSER.parsebytes(raw, headersonly=True)
+    if msg.get_content_maintype() == "multipart":
+        msg = email.message_from_bytes(raw)
+        for part in msg.walk():
+            if part.get_content_type() == "text/plain" and "attachment" not in str(part.get('Content-Disposition')):
+                return (part.get_payload(decode=True) or b"").decode(errors="ignore")
+        return None
+    return (msg.get_payload(decode=True) or b"").decode(errors="ignore")
 
 def fetch_message_body(imap: imaplib.IMAP4_SSL, uid: bytes) -> Optional[str]:  # ← CHANGED
-    status, msg_data = imap.fetch(uid, "(RFC822)")
+    return fetch_message_bodies(imap, [uid]).get(uid)
+
+# Only the body and the two headers needed to decode it; Gmail's header block is larger than an alert.
+_FETCH_ITEMS = "(UID BODY.PEEK[TEXT] BODY.PEEK[HEADER.FIELDS (CONTENT-TYPE CONTENT-TRANSFER-ENCODING)])"
+_UID_RE = re.compile(rb"\bUID (\d+)")
+_MSG_START = re.compile(rb"\d+ \(")  # '<seq> (' opens a message's FETCH response
+_QUOTED_TEXT = re.compile(rb'BODY\[TEXT\] "((?:[^"\\]|\\.)*)"')  # body sent as a quoted string, not a literal
+
+def _decode_text(header: bytes, text: bytes) -> Optional[str]:
+    h = header.lower()
+    if b"multipart/" not in h and b"base64" not in h and b"quoted-printable" not in h:
+        return text.decode(errors="ignore")  # plain single-part body: nothing to decode
+    # the header fields end with their blank line, so header + text is a parseable message
+    return _message_text(header + text)
+
+def fetch_message_bodies(imap: imaplib.IMAP4_SSL, uids: List[bytes]) -> Dict[bytes, Optional[str]]:
+    """
+    Fetch all `uids` with one UID FETCH round-trip instead of one per message.
+    BODY.PEEK leaves the \\Seen flag alone.
+    """
+    if not uids:
+        return {}
+    status, msg_data = imap.uid("FETCH", b",".join(uids).decode(), _FETCH_ITEMS)
     if status != "OK":
-        print(f"[ERROR] fetch UID {uid.decode()}: {status}")
-        return None
+        print(f"[ERROR] fetch {len(uids)} message(s): {status}")
+        return {}
+    # Each message arrives as (b'<seq> (UID n BODY[TEXT] {size}', data), (b' BODY[HEADER.FIELDS ...] {size}', data), b')'
+    # in whatever item order the server picks; a body small enough to be sent quoted comes as bare bytes instead.
+    # Pieces are grouped per message (a new one starts at '<seq> (' or at a different UID) and keyed by the UID
+    # found in any of its pieces.
+    parts: List[Dict[str, Optional[bytes]]] = []
+    cur: Optional[Dict[str, Optional[bytes]]] = None
     for resp in msg_data:
         if isinstance(resp, tuple):
-            msg = email.message_from_bytes(resp[1])
-            if msg.is_multipart():
-                for part in msg.walk():
-                    if part.get_content_type() == "text/plain" and "attachment" not in str(part.get('Content-Disposition')):
-                        return (part.get_payload(decode=True) or b"").decode(errors="ignore")
-            else:
-                return (msg.get_payload(decode=True) or b"").decode(errors="ignore")
-    return None
+            piece, literal = resp
+        elif isinstance(resp, bytes):
+            piece, literal = resp, None
+        else:
+            continue
+        q = _QUOTED_TEXT.search(piece) if literal is None else None
+        m = _UID_RE.search(piece if q is None else piece[:q.start()] + piece[q.end():])  # not inside the body
+        uid = m.group(1) if m else None
+        if cur is None or _MSG_START.match(piece) or (uid is not None and cur["uid"] not in (None, uid)):
+            cur = {"uid": None, "header": b"", "text": b""}
+            parts.append(cur)
+        if uid is not None:
+            cur["uid"] = uid
+        if literal is not None:
+            cur["header" if b"HEADER.FIELDS" in piece else "text"] = literal
+        elif q is not None:
+            cur["text"] = re.sub(rb"\\(.)", rb"\1", q.group(1))
+    return {p["uid"]: _decode_text(p["header"], p["text"]) for p in parts if p["uid"] is not None}
 
 # ──────────────────────────────────────────────────────────────────────────────
 # PROCESSING & FILE OUTPUT  (unchanged)
 # ──────────────────────────────────────────────────────────────────────────────
-def extract_matching_lines(body: Optional[str]) -> List[str]:
+def parse_alert_fields(line: str) -> Optional[Dict[str, object]]:
+    """
+    Fields of one stripped MA alert line: symbol, alert, price, sma20, ema20, ema9 (numbers) and
+    the raw 14-digit 'timestamp' (see ma_alert_regex.parse_fields; re-spaced lines are accepted too).
+    """
+    t = parse_fields(line)
+    if t is None: return None
+    sym, alert, price, sma20, ema20, ema9, ts = t
+    return {"symbol": sym, "alert": alert, "price": price, "sma20": sma20, "ema20": ema20, "ema9": ema9, "timestamp": ts}
+
+def _match_fields(m) -> Dict[str, object]:
+    gd = m.groupdict()
+    return {
+        "symbol": gd["symbol"],
+        "alert": int(gd["alert"]),
+        "price": float(gd["price"]),
+        "sma20": float(gd["sma20"]),
+        "ema20": float(gd["ema20"]),
+        "ema9": float(gd["ema9"]),
+        "timestamp": gd["timestamp"],
+    }
+
+# Line-shaped version of LOOSE_PATTERN for Hyperscan (no capture groups; [ \t] so a match can't run across
+# lines). It only locates candidate lines; each one is still parsed by parse_alert_fields.
+_HS_LINE = (
+    rb"^[ \t]*[A-Z]+(?:\.[A-Z]+)?[ \t]*-[ \t]*MA[ \t]+Alert[ \t]*-[ \t]*\d+[ \t]*-[ \t]*"
+    rb"price:[ \t]*-?\d+(?:\.\d+)?[ \t]*-[ \t]*"
+    rb"SMA_20:[ \t]*-?\d+(?:\.\d+)?,[ \t]*EMA_20:[ \t]*-?\d+(?:\.\d+)?,[ \t]*EMA_9:[ \t]*-?\d+(?:\.\d+)?"
+    rb"[ \t]*-[ \t]*\d{14}[ \t\r]*$"
+)
+_hs_db = None
+
+def _hyperscan_db():
+    global _hs_db
+    if _hs_db is None:
+        _hs_db = hyperscan.Database()
+        _hs_db.compile(
+            expressions=[_HS_LINE], ids=[0], elements=1,
+            flags=[hyperscan.HS_FLAG_MULTILINE | hyperscan.HS_FLAG_SOM_LEFTMOST],
+        )
+    return _hs_db
+
+def _scan_alert_lines(body: str) -> List[str]:
+    """All alert-shaped lines of `body`, in order, from a single Hyperscan pass over the encoded body."""
+    data = body.encode("utf-8")
+    spans: Dict[int, int] = {}
+
+    def on_match(_id, start, end, _flags, _ctx):
+        spans.setdefault(start, end)  # one report per line is enough
+        return None
+
+    _hyperscan_db().scan(data, match_event_handler=on_match)
+    return [data[a:b].decode("utf-8").strip() for a, b in sorted(spans.items())]
+
+def extract_matching_lines(body: Optional[str]) -> List[Tuple[str, Dict[str, object]]]:
+    """Returns (line, fields) pairs so callers can reuse the parsed fields instead of re-parsing."""
     if not body:
         return []
-    return [ln.strip() for ln in body.splitlines() if pattern.match(ln.strip())]
-
-def append_to_consolidated(lines: List[str], date_suffix: str) -> None:
-    if not lines: return
-    with open(f"price_alerts_consolidated_{date_suffix}.txt", "a", encoding="utf-8") as f:
-        f.write("\n".join(lines) + "\n")
-
-def save_to_symbol_files(lines: List[str], date_suffix: str) -> None:
-    for line in lines:
-        m = pattern.match(line)
-        if not m: continue
-        symbol = m.group("symbol")
-        with open(f"{symbol}_price_{date_suffix}.txt", "w", encoding="utf-8") as f:
-            f.write(line + "\n")
-        print(f"[INFO] Updated {symbol}_Renko_{date_suffix}.txt")
+    matches: List[Tuple[str, Dict[str, object]]] = []
+    if hyperscan is not None:
+        for ln in _scan_alert_lines(body):
+            fields = parse_alert_fields(ln)
+            if fields:
+                matches.append((ln, fields))
+        return matches
+    # one C-level sweep over the body instead of splitlines() + strip() + a match per line
+    return [(m.group(0).strip(), _match_fields(m)) for m in _body_re.finditer(body)]
+
+def publish_latest(matches: List[Tuple[str, Dict[str, object]]]) -> None:
+    """Push each record's values to shared memory (no-op unless USE_SHARED_MEMORY)."""
+    if not USE_SHARED_MEMORY: return
+    for _, f in matches:
+        price_shm.publish(f["symbol"], f["alert"], f["price"], f["sma20"], f["ema20"], f["ema9"], f["timestamp"])
+
+# ─── async file writer ──────────────────────────────────────────────────────
+# The monitor coroutine only enqueues lines (keyed by target file); one writer task appends
+# each file's backlog in a single write every WRITE_INTERVAL, so no file I/O sits on the fetch path.
+# IMAP calls and file appends each get their own single worker thread: the IMAP connection is
+# not thread-safe (one thread keeps its commands ordered), and a slow append never queues up
+# behind a long IDLE wait or blocks the loop while the next batch is being parsed.
+# The IMAP worker is a daemon thread: ThreadPoolExecutor workers are joined at interpreter exit, which
+# would hold Ctrl-C or the end of the main thread until a parked IDLE returns.
+class _DaemonWorker(Executor):
+    """Runs submitted calls one at a time, in order, on a single daemon thread started on first use."""
+    def __init__(self, name: str):
+        self._name = name
+        self._calls: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        fut: Future = Future()
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+                self._thread.start()
+        self._calls.put((fut, fn, args, kwargs))
+        return fut
+
+    def _run(self) -> None:
+        while True:
+            fut, fn, args, kwargs = self._calls.get()
+            if not fut.set_running_or_notify_cancel():
+                continue
+            try:
+                fut.set_result(fn(*args, **kwargs))
+            except BaseException as exc:
+                fut.set_exception(exc)
+
+_IMAP_POOL = _DaemonWorker("imap")
+_WRITE_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix="alert-writer")
+
+async def _imap_call(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(_IMAP_POOL, fn, *args)
+
+def _enqueue_lines(queues: Dict[str, asyncio.Queue], path: str, lines: List[str]) -> None:
+    q = queues.get(path)
+    if q is None:
+        q = queues[path] = asyncio.Queue()
+    for ln in lines:
+        q.put_nowait(ln)
+
+def _drain_queues(queues: Dict[str, asyncio.Queue]) -> Dict[str, List[str]]:
+    # runs on the loop (asyncio.Queue isn't thread-safe); only the writes go to the worker thread
+    batches: Dict[str, List[str]] = {}
+    for path, q in queues.items():
+        if q.empty(): continue
+        batch = batches[path] = []
+        while not q.empty():
+            batch.append(q.get_nowait())
+    return batches
+
+def _write_batches(batches: Dict[str, List[str]]) -> None:
+    for path, batch in batches.items():
+        with open(path, "a", encoding="utf-8", buffering=1 << 16) as f:
+            f.write("\n".join(batch) + "\n")
+        print(f"[INFO] Updated {path} (+{len(batch)})")
+
+def _flush_queues(queues: Dict[str, asyncio.Queue]) -> None:
+    _write_batches(_drain_queues(queues))
+
+async def _file_writer(queues: Dict[str, asyncio.Queue], interval: float = WRITE_INTERVAL) -> None:
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            batches = _drain_queues(queues)
+            if batches:
+                await loop.run_in_executor(_WRITE_POOL, _write_batches, batches)
+    finally:
+        _flush_queues(queues)  # don't drop queued lines on cancel/shutdown
 
 # ─── helpers ────────────────────────────────────────────────────────────────
 def _extract_symbol(line: str) -> str:
@@ -161,114 +464,215 @@ def _extract_symbol(line: str) -> str:
     """
     return line.split(",")[0].strip().upper()
 
-def monitor_price_alerts(date_filter: Optional[str] = None) -> None:   # ← CHANGED
+async def monitor_price_alerts_async(date_filter: Optional[str] = None) -> None:
+    """
+    Same loop as before, as a coroutine: blocking IMAP calls run on the IMAP worker thread, parsed
+    lines are published to shared memory right away and queued for the file-writer task.
+    """
     print(f"🔍 Monitoring e-mails from {SENDER_EMAIL} …")
-    while True:
-        try:
-            if date_filter is None or date_filter.strip() == "":
-                date_suffix = datetime.now().strftime("%Y%m%d")
-            else:
-                date_suffix = date_filter
-            imap = connect_to_mailbox()
-            for uid in fetch_email_uids(imap, date_filter):
-                uid_str = uid.decode()
-                if uid_str in processed_uids:
-                    continue
-                lines = extract_matching_lines(fetch_message_body(imap, uid))
-                if lines:
-                    append_to_consolidated(lines, date_suffix)
-                    save_to_symbol_files(lines, date_suffix)
-                    print(f"[INFO] UID {uid_str}: saved {len(lines)} line(s).")
-                processed_uids.add(uid_str)
-            imap.close(); imap.logout()
-        except Exception as exc:
-            print(f"[ERROR] {exc}")
-        print(f"⏳ Sleeping {POLL_INTERVAL} s …\n")
-        time.sleep(POLL_INTERVAL)
-
-def get_s_price(self, symbol: str) -> float:
-        """
-        Retrieve price from a file for the symbol.
-        The file should be named in the format <symbol>_price_<yyyymmdd>.txt.
-        """
-        date_str = datetime.datetime.now().strftime("%Y%m%d")
-        filename = f"{symbol}_price_{date_str}.txt"
-        print(f"Reading stock price for {symbol} from: {filename}")
-        if not os.path.exists(filename):
-            print(f"File {filename} not found. Defaulting price to 0.0")
-            return 0.0
-        with open(filename, "r") as f:
+    queues: Dict[str, asyncio.Queue] = {}
+    writer = asyncio.create_task(_file_writer(queues))
+    imap: Optional[imaplib.IMAP4_SSL] = None   # kept open across iterations
+    last_uid: Optional[int] = None             # highest UID handled on this connection
+    stop = threading.Event()                   # ends a parked IDLE when this coroutine exits
+    fetch_misses: Dict[bytes, int] = {}        # UID -> FETCH replies it was missing from
+    try:
+        while True:
             try:
-                # Expecting a line format like "SYMBOL - Renko - PRICE - TIMESTAMP"
-                content = f.read().strip()
-                value = float(content.split(" - ")[2])
-            except Exception:
-                print("Error converting price to float. Defaulting to 0.0")
-                value = 0.0
-        return value
+                if date_filter is None or date_filter.strip() == "":
+                    date_suffix = _today_suffix()
+                else:
+                    date_suffix = date_filter
+                if imap is None:
+                    imap = await _imap_call(connect_to_mailbox)
+                    last_uid = None  # full search after (re)connecting; processed_uids dedupes
+                uids = await _imap_call(fetch_email_uids, imap, date_filter, last_uid)
+                new_uids = [u for u in uids if not processed_uids.seen(date_suffix, u.decode())]
+                bodies = await _imap_call(fetch_message_bodies, imap, new_uids)
+                missing = [int(u) for u in new_uids if u not in bodies and not _give_up(fetch_misses, date_suffix, u)]
+                if missing:
+                    last_uid = min(missing) - 1  # so the next search still covers them
+                elif uids:
+                    last_uid = max(int(u) for u in uids)
+                for uid in new_uids:
+                    if uid not in bodies:
+                        continue  # not returned by the server; retried next poll
+                    uid_str = uid.decode()
+                    matches = extract_matching_lines(bodies[uid])
+                    if matches:
+                        publish_latest(matches)
+                        _enqueue_lines(queues, f"price_alerts_consolidated_{date_suffix}.txt", [ln for ln, _ in matches])
+                        if WRITE_SYMBOL_FILES:
+                            for ln, f in matches:
+                                _enqueue_lines(queues, f"{f['symbol']}_price_{date_suffix}.txt", [ln])
+                        print(f"[INFO] UID {uid_str}: saved {len(matches)} line(s).")
+                    processed_uids.add(date_suffix, uid_str)
+                if "IDLE" in imap.capabilities:
+                    print("📭 Waiting for new mail (IDLE) …\n")
+                    await _imap_call(wait_for_new_mail, imap, IDLE_TIMEOUT, stop)
+                    continue
+            except Exception as exc:
+                print(f"[ERROR] {exc}")
+                if imap is not None:
+                    # reconnect on the next iteration
+                    try: imap.logout()
+                    except Exception: pass
+                    imap = None
+            print(f"⏳ Sleeping {POLL_INTERVAL} s …\n")
+            await asyncio.sleep(POLL_INTERVAL)
+    finally:
+        stop.set()
+        if imap is not None:
+            _IMAP_POOL.submit(_logout_quietly, imap)  # queued behind the IDLE, which now sends DONE and returns
+        writer.cancel()
+        try: await writer
+        except asyncio.CancelledError: pass
+
+def _give_up(fetch_misses: Dict[bytes, int], date_suffix: str, uid: bytes) -> bool:
+    """Count one more FETCH without `uid`; after MAX_FETCH_ATTEMPTS mark it processed so the search moves past it."""
+    n = fetch_misses[uid] = fetch_misses.get(uid, 0) + 1
+    if n < MAX_FETCH_ATTEMPTS:
+        return False
+    print(f"[WARN] UID {uid.decode()}: no body after {n} fetches, skipping it.")
+    del fetch_misses[uid]
+    processed_uids.add(date_suffix, uid.decode())
+    return True
 
+def _logout_quietly(imap: imaplib.IMAP4_SSL) -> None:
+    try: imap.logout()
+    except Exception: pass
+
+def monitor_price_alerts(date_filter: Optional[str] = None) -> None:   # ← CHANGED
+    """Blocking entry point (Process target); runs `monitor_price_alerts_async` on its own loop."""
+    asyncio.run(monitor_price_alerts_async(date_filter))
 
 # ---------- Indicator file readers & streamer (ADD BELOW) ----------
 from typing import Dict, Callable, Optional, List
-from datetime import datetime as _dt
+from datetime import datetime as _dt, timedelta as _timedelta
 import os as _os
 import time as _time
+import mmap as _mmap
+from typing import Any, Iterator, NamedTuple
+
+class Alert(NamedTuple):
+    """One parsed MA alert: a tuple with named fields, lighter than a 7-key dict per line."""
+    symbol: str
+    alert: int
+    price: float
+    sma20: float
+    ema20: float
+    ema9: float
+    ts: _dt
+
+    def __getitem__(self, key):
+        # rec["price"] keeps working for callbacks written against the old dict records
+        if isinstance(key, str): return getattr(self, key)
+        return tuple.__getitem__(self, key)
+
+    @classmethod
+    def from_dict(cls, rec: Dict[str, Any]) -> "Alert":
+        """A dict record (parse_alert_fields, price_shm.read_latest) → Alert; 'timestamp' may be the raw digits."""
+        ts = rec["ts"] if "ts" in rec else rec["timestamp"]
+        if isinstance(ts, str): ts = _parse_ts(ts)
+        return cls(rec["symbol"], int(rec["alert"]), rec["price"], rec["sma20"], rec["ema20"], rec["ema9"], ts)
+
+def _resolve_date_suffix(date_suffix: Optional[str] = None) -> str:
+    if not date_suffix or not date_suffix.strip():
+        return _today_suffix()
+    return date_suffix
 
 def _symbol_file(symbol: str, date_suffix: Optional[str] = None) -> str:
     """Builds the file path like <SYMBOL>_price_<YYYYMMDD>.txt (same naming your writer uses)."""
-    if not date_suffix or not date_suffix.strip():
-        date_suffix = _dt.now().strftime("%Y%m%d")
-    return f"{symbol.upper()}_price_{date_suffix}.txt"
+    return f"{symbol.upper()}_price_{_resolve_date_suffix(date_suffix)}.txt"
 
-def _parse_alert_line(line: str) -> Optional[dict]:
-    """Parse one MA alert line into a dict using the existing compiled `pattern`."""
-    m = pattern.match(line.strip())
-    if not m:
+def _shm_values(symbol: str, date_suffix: Optional[str] = None) -> Optional[Alert]:
+    """Latest values from shared memory, if the monitor published any for that day."""
+    if not USE_SHARED_MEMORY:
         return None
-    gd = m.groupdict()
-    try:
-        return {
-            "symbol": gd["symbol"].upper(),
-            "alert": int(gd["alert"]),
-            "price": float(gd["price"]),
-            "sma20": float(gd["sma20"]),
-            "ema20": float(gd["ema20"]),
-            "ema9": float(gd["ema9"]),
-            "ts": _dt.strptime(gd["timestamp"], "%Y%m%d%H%M%S"),
-        }
-    except Exception:
+    rec = price_shm.read_latest(symbol)
+    if rec and rec["ts"].strftime("%Y%m%d") == _resolve_date_suffix(date_suffix):
+        return Alert(**rec)
+    return None
+
+def _parse_ts(s: str) -> _dt:
+    """Fixed 14-digit YYYYMMDDHHMMSS → datetime by slicing (strptime is far slower for this)."""
+    return _dt(int(s[0:4]), int(s[4:6]), int(s[6:8]), int(s[8:10]), int(s[10:12]), int(s[12:14]))
+
+def _parse_alert_line(line: str) -> Optional[Alert]:
+    """Parse one MA alert line into an Alert (the fields of `parse_alert_fields`, without the dict)."""
+    t = parse_fields(line.strip())
+    if t is None:
         return None
+    sym, alert, price, sma20, ema20, ema9, raw_ts = t
+    try:
+        ts = _parse_ts(raw_ts)
+    except ValueError:
+        return None  # 14 digits but not a real date/time
+    return Alert(sym.upper(), alert, price, sma20, ema20, ema9, ts)
+
+def _reversed_lines(buf, end: Optional[int] = None) -> Iterator[str]:
+    """Non-empty lines of a bytes-like `buf` (bytes, mmap) up to `end`, newest first, decoding one line at a time."""
+    if end is None: end = len(buf)
+    while end > 0:
+        i = buf.rfind(b"\n", 0, end)
+        line = buf[i + 1:end].strip()
+        end = i  # -1 once the first line has been consumed
+        if line:
+            yield line.decode("utf-8", errors="replace")
+
+def _iter_lines_reversed(path: str) -> Iterator[str]:
+    """
+    Yield the non-empty lines of `path` newest first. The file is mmapped and scanned backwards
+    for newlines, so reading the last line costs one line's worth of work however big the file is.
+    """
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return  # no file for that day (yet)
+    with f:
+        try:
+            mm = _mmap.mmap(f.fileno(), 0, access=_mmap.ACCESS_READ)
+        except ValueError:
+            return  # empty file: nothing to map
+        with mm:
+            yield from _reversed_lines(mm)
+
+def get_indicator_values_by_path(path: str, symbol: str) -> Optional[Alert]:
+    """Latest parsed alert for `symbol` in `path` (newest matching line wins); no date or shm lookup."""
+    sym = symbol.upper()
+    # pick the last parseable line (safest if multiple writes happen)
+    for ln in _iter_lines_reversed(path):
+        rec = _parse_alert_line(ln)
+        if rec and rec.symbol == sym:
+            return rec
+    return None
+
+def _latest_record(symbol: str, date_suffix: Optional[str] = None) -> Optional[Alert]:
+    """Latest parsed alert for `symbol` from its per-day file."""
+    return get_indicator_values_by_path(_symbol_file(symbol, date_suffix), symbol)
 
 def get_s_price(symbol: str, date_suffix: Optional[str] = None) -> Optional[float]:
     """
     Read the latest MA alert line for `symbol` and return just the price.
     Does not alter any other logic; file format is the same one you already write.
+    Served from shared memory when the monitor has published there.
     """
-    path = _symbol_file(symbol, date_suffix)
-    if not _os.path.exists(path):
-        return None
-    with open(path, "r", encoding="utf-8") as f:
-        # pick the last non-empty line (safest if multiple writes happen)
-        for ln in reversed([ln for ln in f.read().splitlines() if ln.strip()]):
-            rec = _parse_alert_line(ln)
-            if rec and rec["symbol"] == symbol.upper():
-                return rec["price"]
-    return None
+    rec = _shm_values(symbol, date_suffix)
+    if rec:
+        return rec.price
+    rec = _latest_record(symbol, date_suffix)
+    return rec.price if rec else None
 
-def get_indicator_values(symbol: str, date_suffix: Optional[str] = None) -> Optional[dict]:
+def get_indicator_values(symbol: str, date_suffix: Optional[str] = None) -> Optional[Alert]:
     """
-    Read the latest MA alert line and return a dict with:
-    {'symbol','alert','price','sma20','ema20','ema9','ts' (datetime)}
+    Read the latest MA alert line and return an Alert with:
+    symbol, alert, price, sma20, ema20, ema9, ts (datetime); rec["price"] style access still works.
+    Served from shared memory when the monitor has published there.
     """
-    path = _symbol_file(symbol, date_suffix)
-    if not _os.path.exists(path):
-        return None
-    with open(path, "r", encoding="utf-8") as f:
-        for ln in reversed([ln for ln in f.read().splitlines() if ln.strip()]):
-            rec = _parse_alert_line(ln)
-            if rec and rec["symbol"] == symbol.upper():
-                return rec
-    return None
+    rec = _shm_values(symbol, date_suffix)
+    if rec:
+        return rec
+    return _latest_record(symbol, date_suffix)
 
 def update_indicator_from_file(indicator: "Indicator", symbol: str, date_suffix: Optional[str] = None) -> bool:
     """
@@ -278,55 +682,82 @@ def update_indicator_from_file(indicator: "Indicator", symbol: str, date_suffix:
     rec = get_indicator_values(symbol, date_suffix)
     if not rec:
         return False
-    ts = rec["ts"]
-    indicator.price.update(rec["price"], ts)
-    indicator.sma20.update(rec["sma20"], ts)
-    indicator.ema20.update(rec["ema20"], ts)
-    indicator.ema9.update(rec["ema9"], ts)
+    _apply_record(indicator, rec)
     return True
 
-def stream_indicator_updates(
+def _apply_record(ind: "Indicator", rec: Alert) -> None:
+    ts = rec.ts
+    ind.price.update(rec.price, ts)
+    ind.sma20.update(rec.sma20, ts)
+    ind.ema20.update(rec.ema20, ts)
+    ind.ema9.update(rec.ema9, ts)
+
+def _alert_record(a) -> Alert:
+    """alert_parser.ParsedAlert → the Alert get_indicator_values returns."""
+    return Alert(a.symbol, a.alert_id, a.price, a.sma20, a.ema20, a.ema9, a.ts)
+
+async def stream_indicator_updates_async(
     symbols: List[str],
     date_suffix: Optional[str] = None,
-    on_update: Optional[Callable[[str, "Indicator", dict], None]] = None,
+    on_update: Optional[Callable[[str, "Indicator", Alert], None]] = None,
 ) -> Dict[str, "Indicator"]:
     """
-    Continuously reads each symbol's file and pushes values into per-symbol Indicator objects.
-    Uses your existing POLL_INTERVAL for cadence. Calls `on_update(sym, indicator, rec)` on new data.
-    Returns the symbol->Indicator map (useful if you run this in the foreground).
+    Pushes each symbol's alerts into per-symbol Indicator objects as lines land in its file.
+    Starts from the file's latest record, then follows appends via file_stream (inotify when
+    available, else stat() polling every POLL_INTERVAL). Calls `on_update(sym, indicator, rec)` on new data.
     """
     # Lazy import to avoid circulars regardless of where indicators.py lives
     try:
         from indicators import Indicator  # top-level
     except Exception:
         from indicators import Indicator  # alt path if you use src.*
+    from file_stream import merged_file_stream
 
     indicators_by_symbol: Dict[str, Indicator] = {s.upper(): Indicator() for s in symbols}
-    last_ts_by_symbol: Dict[str, str] = {}
+
+    def _emit(sym: str, rec: Alert) -> None:
+        ind = indicators_by_symbol[sym]
+        _apply_record(ind, rec)
+        if on_update:
+            try:
+                on_update(sym, ind, rec)
+            except Exception:
+                pass
 
     while True:
-        for s in symbols:
-            sym = s.upper()
-            rec = get_indicator_values(sym, date_suffix)
-            if not rec:
-                continue
-            ts_key = rec["ts"].strftime("%Y%m%d%H%M%S")
-            if last_ts_by_symbol.get(sym) == ts_key:
-                continue  # already processed this tick
-            # Update series
-            ind = indicators_by_symbol[sym]
-            ind.price.update(rec["price"], rec["ts"])
-            ind.sma20.update(rec["sma20"], rec["ts"])
-            ind.ema20.update(rec["ema20"], rec["ts"])
-            ind.ema9.update(rec["ema9"], rec["ts"])
-            last_ts_by_symbol[sym] = ts_key
-            if on_update:
+        # paths are resolved once per day; with no fixed date_suffix the tailers are rebuilt at midnight
+        day = _resolve_date_suffix(date_suffix)
+        paths = {sym: _symbol_file(sym, day) for sym in indicators_by_symbol}
+        for sym, path in paths.items():
+            rec = _shm_values(sym, day) or get_indicator_values_by_path(path, sym)  # the tailers below start at EOF
+            if rec:
+                _emit(sym, rec)
+
+        stream = merged_file_stream(paths, poll_sec=POLL_INTERVAL)
+        try:
+            while True:
+                timeout = None if date_suffix else _seconds_until_midnight()
                 try:
-                    on_update(sym, ind, rec)
-                except Exception:
-                    pass
-        _time.sleep(POLL_INTERVAL)
-    # (unreached) return indicators_by_symbol
+                    batch = await asyncio.wait_for(stream.__anext__(), timeout)
+                except asyncio.TimeoutError:
+                    break  # day rolled over
+                for alert in batch:
+                    _emit(alert.symbol, _alert_record(alert))
+        finally:
+            await stream.aclose()
+
+def _seconds_until_midnight() -> float:
+    now = _dt.now()
+    midnight = (now + _timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return (midnight - now).total_seconds()
+
+def stream_indicator_updates(
+    symbols: List[str],
+    date_suffix: Optional[str] = None,
+    on_update: Optional[Callable[[str, "Indicator", Alert], None]] = None,
+) -> Dict[str, "Indicator"]:
+    """Blocking form of `stream_indicator_updates_async` (runs forever on its own event loop)."""
+    return asyncio.run(stream_indicator_updates_async(symbols, date_suffix, on_update))
 
 
 
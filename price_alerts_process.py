@@ -3,14 +3,14 @@ import os
 import sys
 import time
 import datetime as _dt
-from dotenv import load_dotenv
 from multiprocessing import Process
 
 # Add the "src" directory to the module search path.
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
 
 # from src.common.trading_engine import TradingEngine
-from price_alerts import monitor_price_alerts
+from price_alerts import monitor_price_alerts  # the one monitor (IDLE, UID dedupe, shm); src.common's is the old copy
+from env_utils import ensure_env_loaded
 
 def main():
     # args = parse_args()
@@ -25,7 +25,7 @@ def main():
 
     # Assuming main.py is in trading_bot/ (project root), load .env from the same directory.
     dotenv_path = os.path.join(os.path.dirname(__file__), ".env")
-    load_dotenv(dotenv_path=dotenv_path)
+    ensure_env_loaded(dotenv_path=dotenv_path)
     
     parse_time = int(os.getenv("PARSE_TIME", 10))
 
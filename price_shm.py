@@ -0,0 +1,131 @@
+# price_shm.py
+# Latest MA-alert values per symbol in shared memory, so readers skip re-reading/parsing <SYMBOL>_price_<YYYYMMDD>.txt.
+from __future__ import annotations
+import atexit
+import os
+import struct
+import sys
+from datetime import datetime
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, Optional, Tuple
+
+# [seq (seqlock counter)] [alert id, price, sma20, ema20, ema9, ts as YYYYMMDDHHMMSS]
+_SEQ = struct.Struct("<Q")
+_DATA = struct.Struct("<QddddQ")
+_SIZE = 64
+_MAX_RETRIES = 100
+
+# Linux keeps segments as files here; a segment's inode tells a restarted writer's fresh one from the
+# unlinked segment a reader still maps. Elsewhere there is no such check, so readers re-attach per read.
+_SHM_DIR: Optional[str] = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+_writers: Dict[str, SharedMemory] = {}
+_readers: Dict[str, Tuple[SharedMemory, Optional[int]]] = {}  # symbol -> (mapping, inode it was attached at)
+
+def shm_name(symbol: str) -> str:
+    return f"px_{symbol.upper().replace('.', '_')}"
+
+# ---- writer side (single writer per symbol: the alert monitor) ----
+def _writer_segment(symbol: str) -> SharedMemory:
+    shm = _writers.get(symbol)
+    if shm is None:
+        try:
+            shm = SharedMemory(name=shm_name(symbol), create=True, size=_SIZE)
+        except FileExistsError:
+            # left behind by a previous monitor run; reuse it
+            shm = SharedMemory(name=shm_name(symbol))
+        _writers[symbol] = shm
+    return shm
+
+def publish(symbol: str, alert: int, price: float, sma20: float, ema20: float, ema9: float, ts: str) -> None:
+    """Store the latest values for `symbol`. `ts` is the 14-digit alert timestamp."""
+    buf = _writer_segment(symbol.upper()).buf
+    seq = _SEQ.unpack_from(buf, 0)[0]
+    _SEQ.pack_into(buf, 0, seq + 1)  # odd → write in progress
+    _DATA.pack_into(buf, _SEQ.size, alert, price, sma20, ema20, ema9, int(ts))
+    _SEQ.pack_into(buf, 0, seq + 2)
+
+@atexit.register
+def _release_writers() -> None:
+    # the writer owns its segments; drop them on exit so readers fall back to the files
+    for shm in _writers.values():
+        shm.close()
+        shm.unlink()
+    _writers.clear()
+
+# ---- reader side ----
+def _attach_untracked(name: str) -> Optional[SharedMemory]:
+    """
+    Attach to another process' segment without this process' resource tracker claiming it: the
+    tracker would unlink it at exit and pull it from under the writer.
+    """
+    try:
+        if sys.version_info >= (3, 13):
+            return SharedMemory(name=name, track=False)
+        shm = SharedMemory(name=name)
+    except FileNotFoundError:
+        return None
+    if os.name == "posix":
+        resource_tracker.unregister("/" + shm.name, "shared_memory")  # registered with its leading slash
+    return shm
+
+def _segment_ino(name: str) -> Optional[int]:
+    """Inode now under `name` (None where it can't be told); FileNotFoundError once the writer unlinked it."""
+    return os.stat(os.path.join(_SHM_DIR, name)).st_ino if _SHM_DIR else None
+
+def _reader_segment(symbol: str) -> Optional[SharedMemory]:
+    # publishing from this same process (in-process monitor): read the writer's own mapping, whose
+    # tracker registration its unlink() at exit still has to find
+    shm = _writers.get(symbol)
+    if shm is not None:
+        return shm
+    name = shm_name(symbol)
+    try:
+        ino = _segment_ino(name)
+    except FileNotFoundError:
+        ino = -1  # writer exited: fall back to the files
+    cached = _readers.pop(symbol, None)
+    if cached is not None:
+        if ino is not None and ino == cached[1]:
+            _readers[symbol] = cached
+            return cached[0]
+        cached[0].close()  # unlinked or replaced by a restarted writer: its values are frozen
+    if ino == -1:
+        return None
+    shm = _attach_untracked(name)
+    if shm is not None:
+        _readers[symbol] = (shm, ino)
+    return shm
+
+def read_latest(symbol: str) -> Optional[dict]:
+    """
+    Consistent snapshot of the latest values for `symbol`, shaped like a parsed alert record:
+    {'symbol','alert','price','sma20','ema20','ema9','ts' (datetime)}. None if nothing was published.
+    """
+    sym = symbol.upper()
+    shm = _reader_segment(sym)
+    if shm is None:
+        return None
+    buf = shm.buf
+    for _ in range(_MAX_RETRIES):
+        before = _SEQ.unpack_from(buf, 0)[0]
+        if before & 1:
+            continue  # writer mid-update
+        alert, price, sma20, ema20, ema9, ts = _DATA.unpack_from(buf, _SEQ.size)
+        if _SEQ.unpack_from(buf, 0)[0] == before:
+            break
+    else:
+        return None
+    if before == 0:
+        return None
+    s = str(ts)
+    return {
+        "symbol": sym,
+        "alert": alert,
+        "price": price,
+        "sma20": sma20,
+        "ema20": ema20,
+        "ema9": ema9,
+        "ts": datetime(int(s[0:4]), int(s[4:6]), int(s[6:8]), int(s[8:10]), int(s[10:12]), int(s[12:14])),
+    }
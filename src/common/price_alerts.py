@@ -1,3 +1,4 @@
+# Superseded by the top-level price_alerts.py, which every entry point runs; kept only for reference.
 import imaplib
 import email
 from datetime import datetime
@@ -1,11 +1,18 @@
 from __future__ import annotations
 import time
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 
 from src.common.price_tracker    import FilePriceTracker
 from src.common.webhooks         import send_trade_alert_by_sentiment
 from env_utils import get_env_value
-from src.common.symbol_info import SymbolInfoManager
+from src.common.symbol_info import SymbolInfo, SymbolInfoManager
+
+# tick direction -> (trade side, next expected side, alert sentiment, check block before trading)
+# the bearish path has always re-evaluated the block before its side check; the bullish one hasn't
+SIDES: Dict[int, Tuple[str, str, str, bool]] = {
+    1:  ("buy",  "sell", "bullish", False),
+    -1: ("sell", "buy",  "bearish", True),
+}
 
 class TradingEngine:
     """
@@ -24,23 +31,24 @@ class TradingEngine:
         self.qty           = int(get_env_value('DEFAULT_QTY'))
         self.blocked_symbols: List[str] = []
 
-        # 3. Build tracker: { symbol: webhook_url }
-        symbol_to_webhook: Dict[str, str] = {
-            sym: self.manager.get_info(sym).get_webhook_url()
-            for sym in self.symbol_list
-        }
-        self.price_tracker = FilePriceTracker(symbol_to_webhook)
-
-        # 4. Optionally log each symbol’s broker from SymbolInfo
+        # 3. One pass over SymbolInfo: collect { symbol: webhook_url } for the tracker and
+        #    log each symbol’s broker along the way
         print("––––– Brokers configured –––––")
+        symbol_to_webhook: Dict[str, str] = {}
         for sym in self.symbol_list:
-            broker = self.manager.get_info(sym).get_broker_name()
-            print(f"  {sym}: {broker}")
+            info = self.manager.get_info(sym)
+            symbol_to_webhook[sym] = info.get_webhook_url()
+            print(f"  {sym}: {info.get_broker_name()}")
         print("–––––––––––––––––––––––––––––")
 
-    def evaluate_trade(self, symbol: str) -> None:
+        # 4. Build tracker
+        self.price_tracker = FilePriceTracker(symbol_to_webhook)
+
+    def evaluate_trade(self, symbol: str, info: Optional[SymbolInfo] = None) -> None:
         """
         Strategy: send trade alerts when price ticks up/down, then call P&L guard.
+        `info`: the symbol's SymbolInfo when the caller has already fetched it and checked
+        price_changed (as run() does); without it both happen here.
         """
         # limits = SYMBOL_RULES[symbol]
         # blocked = self._renko_guard_or_flat(
@@ -51,7 +59,7 @@ class TradingEngine:
 
         # if not blocked:
         
-        if not self.price_tracker.price_changed(symbol):
+        if info is None and not self.price_tracker.price_changed(symbol):
             return
 
         new_price = self.price_tracker.current_price(symbol)
@@ -59,71 +67,32 @@ class TradingEngine:
 
         take_profit_factor_per_trade = 2
         
-        # 4. Grab our symbol-info object
-        info    = self.manager.get_info(symbol)
-        self.manager.update_current_price(symbol, new_price)
+        # 4. Grab our symbol-info object once; the manager's update_* calls mutate this same object
+        manager = self.manager
+        if info is None:
+            info = manager.get_info(symbol)
+        manager.update_current_price(symbol, new_price)
 
         if info.unrealized_pnl >= take_profit_factor_per_trade:
-            self.manager.update_realized_pnl(symbol)
-            self.manager.set_unrealized_pnl(symbol, 0)
-            self.manager.update_is_blocked(symbol)
+            manager.update_realized_pnl(symbol)
+            manager.set_unrealized_pnl(symbol, 0)
+            manager.update_is_blocked(symbol)
         else:
             if not info.is_blocked:
                 webhook = info.get_webhook_url()
                 qty     = info.trade_quantity
                 ticker  = info.symbol  # already upper-cased
-                
-                if new_price > old_price and old_price != 0:
-                    # update internal state
-                    # self.manager.process_bullish_trade(symbol, new_price)
-                    # self.manager.update_is_blocked(symbol)
-
-                    # only send alert if not blocked
-                    if info.last_trade_side != "buy" and info.expected_trade_side == "buy":
-                        
-                        # set is_debug_on to True when debugging
-                        is_debug_on = False
-                        
-                        if(not is_debug_on):
-                            send_trade_alert_by_sentiment(
-                                webhook_url = webhook,
-                                ticker      = ticker,
-                                action      = "buy",
-                                sentiment   = "bullish",
-                                quantity    = qty,
-                            )
-                        self.manager.update_realized_pnl(symbol)
-                        self.manager.update_trade_count(symbol)
-                        self.manager.update_last_trade_price(symbol,new_price)
-                        self.manager.update_unrealized_pnl(symbol)
-                        self.manager.update_last_trade_side(symbol, "buy")
-                        self.manager.update_expected_trade_side(symbol, "sell")
-                        self.manager.update_is_blocked(symbol)
-                        info    = self.manager.get_info(symbol)
-                        if info.is_blocked:
-                            print("----------------------------------------------------")
-                            print(f"symbol {symbol} blocked.")
-                            print(f"info.realized_pnl = {info.realized_pnl}")
-                            print("----------------------------------------------------")
 
-                            if(not is_debug_on):
-                                send_trade_alert_by_sentiment(
-                                            webhook_url = webhook,
-                                            ticker      = ticker,
-                                            action      = "exit"
-                                        )
-                    else:
-                        self.manager.update_unrealized_pnl(symbol)
-                        self.manager.update_last_trade_side(symbol, "buy")
-                
-                # 6. On bearish tick
-                elif new_price < old_price and old_price != 0:
-                    # self.manager.process_bearish_trade(symbol, new_price)
-                    self.manager.update_is_blocked(symbol)
+                # 5. +1 on an up tick, -1 on a down tick; no trade on a flat tick or without a previous price
+                direction = (new_price > old_price) - (new_price < old_price) if old_price != 0 else 0
+                if direction:
+                    side, next_side, sentiment, block_first = SIDES[direction]
+                    if block_first:
+                        manager.update_is_blocked(symbol)
 
                     # only send alert if not blocked
-                    if info.last_trade_side != "sell" and info.expected_trade_side == "sell":
-                        
+                    if info.last_trade_side != side and info.expected_trade_side == side:
+
                         # set is_debug_on to True when debugging
                         is_debug_on = False
 
@@ -131,18 +100,17 @@ class TradingEngine:
                             send_trade_alert_by_sentiment(
                                 webhook_url = webhook,
                                 ticker      = ticker,
-                                action      = "sell",
-                                sentiment   = "bearish",
+                                action      = side,
+                                sentiment   = sentiment,
                                 quantity    = qty,
                             )
-                        self.manager.update_realized_pnl(symbol)
-                        self.manager.update_trade_count(symbol)
-                        self.manager.update_last_trade_price(symbol,new_price)
-                        self.manager.update_unrealized_pnl(symbol)
-                        self.manager.update_last_trade_side(symbol, "sell")
-                        self.manager.update_expected_trade_side(symbol, "buy")
-                        self.manager.update_is_blocked(symbol)
-                        info    = self.manager.get_info(symbol)
+                        manager.update_realized_pnl(symbol)
+                        manager.update_trade_count(symbol)
+                        manager.update_last_trade_price(symbol,new_price)
+                        manager.update_unrealized_pnl(symbol)
+                        manager.update_last_trade_side(symbol, side)
+                        manager.update_expected_trade_side(symbol, next_side)
+                        manager.update_is_blocked(symbol)
                         if info.is_blocked:
                             print("----------------------------------------------------")
                             print(f"symbol {symbol} blocked.")
@@ -156,20 +124,9 @@ class TradingEngine:
                                             action      = "exit"
                                         )
                     else:
-                        self.manager.update_unrealized_pnl(symbol)
-                        self.manager.update_last_trade_side(symbol, "sell")
-                # if info.is_blocked:
-                #     print("----------------------------------------------------")
-                #     print(f"symbol {symbol} blocked.")
-                #     print(f"info.realized_pnl = {info.realized_pnl}")
-                #     print("----------------------------------------------------")
-
-                #     send_trade_alert_by_sentiment(
-                #                 webhook_url = webhook,
-                #                 ticker      = ticker,
-                #                 action      = "exit"
-                #             )
-                    
+                        manager.update_unrealized_pnl(symbol)
+                        manager.update_last_trade_side(symbol, side)
+
                 # 7. Log for debugging
                 print(f"[{symbol}] old={old_price:.2f} new={new_price:.2f}")
             else:
@@ -183,8 +140,11 @@ class TradingEngine:
                 # 1. Refresh prices
                 self.price_tracker.poll()
 
-                # 2. Iterate through all managed symbols
+                # 2. Iterate through all managed symbols; quiet ones are skipped before any SymbolInfo lookup
+                price_changed = self.price_tracker.price_changed
                 for symbol in self.manager.symbols():
+                    if not price_changed(symbol):
+                        continue
                     info = self.manager.get_info(symbol)
 
                     # 3. Skip if this symbol has been blocked
@@ -192,7 +152,7 @@ class TradingEngine:
                         continue
 
                     print(f"\n--- Processing {symbol} ---")
-                    self.evaluate_trade(symbol)
+                    self.evaluate_trade(symbol, info)
 
                 # 4. Wait before next poll
                 print(f"\nSleeping {self.poll_interval} seconds…\n")
@@ -1,15 +1,29 @@
 from __future__ import annotations
 
-import argparse, os, re, sys, time, json
+import argparse, math, os, re, sys, time, json
+from datetime import datetime, timezone
 from dataclasses import dataclass, field, asdict
-from math import floor
 from typing import Optional, Dict, Any, List, Iterable, Callable, Tuple, Literal
-from datetime import datetime
-from trends import Trend, trend_of
+import numpy as np
+from trends import Trend, trend_of, trend_of_fast
 from options import OptionContract
 from stock_config import StockConfig
 from typing import TYPE_CHECKING
 
+try:
+    # optional: orjson serializes large watchlists several times faster than json
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    # optional: ijson streams load_watchlist's items instead of parsing the whole file up front
+    import ijson
+except ImportError:
+    ijson = None
+
+import sizing_core
+
 if TYPE_CHECKING:
     # match your actual module name/path; use local if files sit together
     from trade_asset import DayTradeAsset
@@ -18,15 +32,21 @@ if TYPE_CHECKING:
 Side = Literal["LONG","SHORT"]
 Right = Literal["C","P"]
 
+# Tick rounding (kept in Python: CPython's correctly rounded round(x, 10) defines the stored prices)
+round_to_tick: Callable[[float, float], float] = sizing_core.round_to_tick
+def round_to_tick_array(px: Any, tick: float) -> np.ndarray:
+    """round_to_tick over an array in one pass; np.rint rounds half to even like round()."""
+    return np.round(np.rint(np.asarray(px, dtype=float) / tick) * tick, 10)
 
-@dataclass
-class Stock:
-    def __init__(
-        self,
-        symbol : Optional[str] = None,
-    ) -> None:
-        self.symbol = symbol
 
+def _iso_to_ms(ts: str) -> int:
+    """iso_updated_at's 'YYYY-MM-DDTHH:MM:SSZ' (or any ISO-8601 time; naive means UTC) -> unix ms."""
+    dt = datetime.fromisoformat(ts[:-1] + "+00:00" if ts.endswith("Z") else ts)
+    if dt.tzinfo is None: dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp()) * 1000 + dt.microsecond // 1000
+
+@dataclass(slots=True)  # one per watchlist symbol: no per-instance __dict__
+class Stock:
     # Identity & trading meta (stock)
     symbol: str
     name: Optional[str] = None
@@ -48,7 +68,7 @@ class Stock:
     ask: Optional[float] = None
     vwap: Optional[float] = None
     atr: Optional[float] = None
-    updated_at: Optional[str] = None
+    updated_at: Optional[int] = None   # unix ms (touch); ISO-8601 'Z' string only in to_dict / saved watchlists
 
     # Intraday levels (stock)
     premarket_high: Optional[float] = None
@@ -76,8 +96,8 @@ class Stock:
     trend: Trend = None
     previous_trend: Trend = None
 
-    # Asset configuration
-    # stock_config = StockConfig(symbol)
+    # Asset configuration (built from the symbol in __post_init__ when not given)
+    config: Optional[StockConfig] = field(default=None, repr=False)
 
     _cached: Dict[str, Any] = field(default_factory=dict, repr=False)
 
@@ -99,12 +119,17 @@ class Stock:
                     if hasattr(self.config, "symbol"): self.config.symbol = self.symbol
 
     # Utilities
-    def touch(self) -> None: self.updated_at = datetime.utcnow().isoformat(timespec="seconds")+"Z"
+    def touch(self) -> None: self.updated_at = time.time_ns() // 1_000_000  # formatted only on export (iso_updated_at)
+    def iso_updated_at(self) -> Optional[str]:
+        ts = self.updated_at
+        if ts is None: return None
+        return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(ts // 1000)) + "Z"
     def add_tag(self, tag: str) -> None:
         if tag not in self.tags: self.tags.append(tag)
     def remove_tag(self, tag: str) -> None:
         if tag in self.tags: self.tags.remove(tag)
-    def round_price(self, price: float) -> float: return round(round(price / self.tick_size) * self.tick_size, 10)
+    def round_price(self, price: float) -> float: return round_to_tick(price, self.tick_size)
+    def round_prices(self, prices: Any) -> np.ndarray: return round_to_tick_array(prices, self.tick_size)
     def round_qty(self, qty: int) -> int:
         qty = int(qty); return max(self.lot_size, (qty // self.lot_size) * self.lot_size)
     def update_quote(self, last: Optional[float]=None, bid: Optional[float]=None, ask: Optional[float]=None, vwap: Optional[float]=None) -> None:
@@ -129,6 +154,8 @@ class Stock:
         self.previous_trend = self.trend; self.trend = new_trend; return self.trend
     def update_trend_from_record(self, rec: Dict[str, Any]) -> Trend:
         return self.set_trend(trend_of(rec))
+    def update_trend_from_values(self, sma20: float, ema20: float, ema9: float) -> Trend:
+        return self.set_trend(trend_of_fast(sma20, ema20, ema9))
     def is_uptrend(self) -> bool: return self.trend == "UP"
     def is_downtrend(self) -> bool: return self.trend == "DOWN"
     def reversed_trend(self) -> bool:
@@ -141,22 +168,16 @@ class Stock:
         if self.max_dollars_risk is not None: dollars = min(dollars, self.max_dollars_risk)
         return max(0.0, float(dollars))
     def size_for_entry(self, entry: float, stop: float, account_equity: float, risk_pct: Optional[float]=None, include_costs: bool=True) -> int:
-        entry = self.round_price(entry); stop = self.round_price(stop)
-        per_share_risk = abs(entry - stop)
-        if include_costs: per_share_risk += (self.slippage_cents/100.0) + self.fee_per_share
-        if per_share_risk <= 0: return 0
-        qty = floor(self.risk_dollars(account_equity, risk_pct) / per_share_risk)
-        return self.round_qty(qty)
+        return sizing_core.size_for_entry(entry, stop, self.tick_size, self.slippage_cents, self.fee_per_share,
+                                  self.risk_dollars(account_equity, risk_pct), self.lot_size, include_costs)
 
     # Targets (stock)
     def compute_targets(self, side: Side, entry: float, stop: float, rr: float=2.0, extra_targets: Optional[List[float]]=None) -> Dict[str, Any]:
-        entry = self.round_price(entry); stop = self.round_price(stop); risk = abs(entry - stop)
+        tick = self.tick_size; entry, risk = sizing_core.entry_risk(entry, stop, tick)
         if risk <= 0: return {"tp": None, "custom": []}
-        tp = self.round_price(entry + rr*risk) if side=="LONG" else self.round_price(entry - rr*risk)
-        custom = []
-        if extra_targets:
-            for r in extra_targets:
-                custom.append(self.round_price(entry + (r*risk) if side=="LONG" else entry - (r*risk)))
+        sign = 1.0 if side=="LONG" else -1.0  # side resolved once; targets are entry ± r*risk
+        tp = sizing_core.target(entry, risk, sign, rr, tick)
+        custom = [sizing_core.target(entry, risk, sign, r, tick) for r in extra_targets] if extra_targets else []
         return {"tp": tp, "custom": custom}
 
     # Order payloads (stock)
@@ -170,7 +191,8 @@ class Stock:
         }
 
     # Options helpers
-    def _round_option(self, px: float) -> float: return round(round(px / self.option_tick) * self.option_tick, 10)
+    def _round_option(self, px: float) -> float: return round_to_tick(px, self.option_tick)
+    def _round_options(self, px: Any) -> np.ndarray: return round_to_tick_array(px, self.option_tick)
     def pick_option(self, chain: Iterable[Dict[str, Any] | OptionContract], right: Right, target_delta: Optional[float]=None, prefer_dte: Optional[int]=None, max_debit: Optional[float]=None) -> Optional[OptionContract]:
         td = self.opt_target_delta if target_delta is None else target_delta
         pd = self.opt_prefer_dte if prefer_dte is None else prefer_dte
@@ -185,9 +207,9 @@ class Stock:
             norm = [c for c in norm if c.dte == best_dte] or norm
         if cap is not None:
             norm = [c for c in norm if (c.premium_for(self.opt_price_policy) or 0) <= cap] or norm
+        want = td if right=="C" else -abs(td)
         def delta_err(c: OptionContract) -> float:
             if c.delta is None: return 1e9
-            want = td if right=="C" else -abs(td)
             return abs(c.delta - want)
         chosen = min(norm, key=delta_err)
         prem = chosen.premium_for(self.opt_price_policy)
@@ -197,11 +219,51 @@ class Stock:
                 if prem is not None: break
         chosen.mark = prem if chosen.mark is None else chosen.mark
         return chosen
+    def pick_option_vec(self, chain: Any, right: Right, target_delta: Optional[float]=None, prefer_dte: Optional[int]=None, max_debit: Optional[float]=None) -> Optional[OptionContract]:
+        """
+        pick_option over a columnar chain (structured/record array or dict of equal-length arrays with
+        strike, right, expiry and any of bid/ask/mark/last/delta/dte/...; NaN = missing). Same choice,
+        made with NumPy masks; only the winning row becomes an OptionContract.
+        """
+        td = self.opt_target_delta if target_delta is None else target_delta
+        pd = self.opt_prefer_dte if prefer_dte is None else prefer_dte
+        cap = self.opt_max_debit if max_debit is None else max_debit
+        names = chain.dtype.names if hasattr(chain, "dtype") else chain
+        n = len(chain["strike"])
+        nan = np.full(n, np.nan)
+        def col(name: str) -> np.ndarray: return np.asarray(chain[name], dtype=float) if name in names else nan
+        idx = np.flatnonzero(np.asarray(chain["right"]) == right)
+        if idx.size == 0: return None
+        dte = col("dte")
+        d = dte[idx]
+        if not np.isnan(d).all():
+            opts = np.unique(d[~np.isnan(d)])  # sorted, so ties go to the nearer-dated expiry like min() over the set
+            best_dte = opts[np.argmin(np.abs(opts - pd))]
+            idx = idx[d == best_dte]
+        bid, ask, mark, last = col("bid"), col("ask"), col("mark"), col("last")
+        if cap is not None:
+            prem = {"BID": bid, "ASK": ask, "MARK": mark, "LAST": last}.get(self.opt_price_policy)
+            if prem is None:  # MID, as OptionContract.mid(): bid/ask midpoint, else mark, else last
+                prem = np.where(np.isnan(bid) | np.isnan(ask), np.where(np.isnan(mark), last, mark), (bid + ask) / 2.0)
+            ok = np.nan_to_num(prem[idx], nan=0.0) <= cap
+            idx = idx[ok] if ok.any() else idx
+        want = td if right=="C" else -abs(td)
+        err = np.abs(col("delta")[idx] - want)
+        i = int(idx[np.argmin(np.where(np.isnan(err), 1e9, err))])
+        def val(name: str, cast: Callable[[Any], Any] = float) -> Any:
+            if name not in names: return None
+            v = chain[name][i]
+            return None if isinstance(v, (float, np.floating)) and v != v else cast(v)
+        chosen = OptionContract(symbol=val("symbol", str) or self.symbol, expiry=val("expiry", str), strike=float(chain["strike"][i]), right=right, multiplier=val("multiplier", int) or self.option_multiplier, bid=val("bid"), ask=val("ask"), mark=val("mark"), last=val("last"), delta=val("delta"), gamma=val("gamma"), theta=val("theta"), vega=val("vega"), iv=val("iv"), volume=val("volume", int), open_interest=val("open_interest", int), dte=val("dte", int))
+        prem = chosen.premium_for(self.opt_price_policy)
+        if prem is None:
+            for pol in ("MARK","LAST","MID","ASK","BID"):
+                prem = chosen.premium_for(pol)
+                if prem is not None: break
+        chosen.mark = prem if chosen.mark is None else chosen.mark
+        return chosen
     def size_options_single(self, premium: float, account_equity: float, risk_pct: Optional[float]=None) -> int:
-        risk_cap = self.risk_dollars(account_equity, risk_pct)
-        per_contract_risk = max(0.0, premium) * self.option_multiplier
-        if per_contract_risk <= 0: return 0
-        return max(0, floor(risk_cap / per_contract_risk))
+        return sizing_core.size_options_single(premium, self.option_multiplier, self.risk_dollars(account_equity, risk_pct))
     def order_option_single(self, contract: OptionContract, qty: int, price_policy: Optional[Literal["MID","BID","ASK","MARK","LAST"]]=None, limit_price: Optional[float]=None, tif: str="DAY", order_type: str="LIMIT") -> Dict[str, Any]:
         pol = self.opt_price_policy if price_policy is None else price_policy
         px = self._round_option(contract.premium_for(pol) if limit_price is None else limit_price)
@@ -224,13 +286,50 @@ class Stock:
         return {"preview": preview, "order": order}
 
     # Persistence
-    def to_dict(self) -> Dict[str, Any]: d = asdict(self); d.pop("_cached", None); return d
+    def to_dict(self) -> Dict[str, Any]:
+        # field by field (same keys/order as asdict minus config and _cached): asdict deep-copies every value
+        return {
+            "symbol": self.symbol, "name": self.name, "exchange": self.exchange, "tick_size": self.tick_size, "lot_size": self.lot_size,
+            "tags": list(self.tags), "notes": self.notes, "catalyst": self.catalyst,
+            "avg_vol_20d": self.avg_vol_20d, "premarket_vol": self.premarket_vol, "float_shares_millions": self.float_shares_millions,
+            "last": self.last, "bid": self.bid, "ask": self.ask, "vwap": self.vwap, "atr": self.atr, "updated_at": self.iso_updated_at(),
+            "premarket_high": self.premarket_high, "premarket_low": self.premarket_low, "open_range_high": self.open_range_high,
+            "open_range_low": self.open_range_low, "yesterday_high": self.yesterday_high, "yesterday_low": self.yesterday_low,
+            "risk_pct_per_trade": self.risk_pct_per_trade, "max_dollars_risk": self.max_dollars_risk, "slippage_cents": self.slippage_cents,
+            "fee_per_share": self.fee_per_share, "option_tick": self.option_tick, "option_multiplier": self.option_multiplier,
+            "opt_target_delta": self.opt_target_delta, "opt_prefer_dte": self.opt_prefer_dte, "opt_max_debit": self.opt_max_debit,
+            "opt_price_policy": self.opt_price_policy, "trend": self.trend, "previous_trend": self.previous_trend,
+        }
     @classmethod
-    def from_dict(cls, d: Dict[str, Any]) -> "DayTradeAsset": return cls(**d)
+    def from_dict(cls, d: Dict[str, Any]) -> "DayTradeAsset":
+        ts = d.get("updated_at")
+        if isinstance(ts, str): d = {**d, "updated_at": _iso_to_ms(ts)}  # saved as ISO text, held as unix ms
+        return cls(**d)
     @staticmethod
-    def save_watchlist(items: List["DayTradeAsset"], path: str) -> None:
-        with open(path, "w", encoding="utf-8") as f: json.dump([i.to_dict() for i in items], f, indent=2)
+    def _dumps_item(d: Dict[str, Any]) -> str:
+        # orjson writes NaN/inf as null, which would load back as None: such items keep json's NaN/Infinity
+        if orjson is None or any(type(v) is float and not math.isfinite(v) for v in d.values()):
+            return json.dumps(d, indent=2)
+        return orjson.dumps(d, option=orjson.OPT_INDENT_2).decode()
     @staticmethod
-    def load_watchlist(path: str) -> List["DayTradeAsset"]:
-        with open(path, "r", encoding="utf-8") as f: data = json.load(f)
-        return [DayTradeAsset.from_dict(x) for x in data]
\ No newline at end of file
+    def save_watchlist(items: List["DayTradeAsset"], path: str) -> None:
+        # one item at a time, so no full list of dicts is built. Same values as json.dump(list, indent=2), not
+        # the same text: orjson spells floats 1e-7 / 1e16 (json: 1e-07 / 1e+16) and writes non-ASCII as UTF-8
+        with open(path, "w", encoding="utf-8") as f:
+            sep = "[\n  "
+            for i in items:
+                f.write(sep); f.write(Stock._dumps_item(i.to_dict()).replace("\n", "\n  ")); sep = ",\n  "
+            f.write("[]" if sep == "[\n  " else "\n]")
+    @classmethod
+    def load_watchlist(cls, path: str) -> List["Stock"]:
+        with open(path, "rb") as f:
+            if ijson is not None:  # stream items as the file is read instead of building the whole tree first
+                try: return [cls.from_dict(x) for x in ijson.items(f, "item", use_float=True)]
+                except ijson.JSONError: f.seek(0)  # NaN/Infinity items (see _dumps_item): parse with json below
+            raw = f.read()
+        if orjson is not None:
+            try: data = orjson.loads(raw)
+            except orjson.JSONDecodeError: data = json.loads(raw)  # NaN/Infinity are json's extension, not orjson's
+        else:
+            data = json.loads(raw)
+        return [cls.from_dict(x) for x in data]
\ No newline at end of file
@@ -1,8 +1,8 @@
 from __future__ import annotations
 
-import os, sys, time
+import inspect, os, sys, time
 from dataclasses import dataclass
-from typing import TYPE_CHECKING, Callable, Dict, Optional, List, Any
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Optional, List, Any, Tuple
 
 # ---- Required: your helpers from price_alerts.py (already added earlier) ----
 import price_alerts as pa
@@ -16,19 +16,54 @@ if TYPE_CHECKING:
 
 # ----------------------------- Utilities -----------------------------
 
-def _apply(obj: Any, name: str, value: Any) -> None:
-    """Set attribute via set_<name>() if present, else setattr if allowed."""
-    if value is None: return
+# (name, bound set_<name> or None, obj has attribute <name>)
+_Setter = Tuple[str, Optional[Callable[[Any], Any]], bool]
+
+def _probe(obj: Any, name: str) -> _Setter:
+    """
+    How _apply sets `name` on `obj`, checked up front instead of by catching failures: the bound
+    set_<name> if it takes a single value, and whether `name` exists and is writable (not a read-only
+    property, not a frozen dataclass).
+    """
     setter = getattr(obj, f"set_{name}", None)
     if callable(setter):
-        try: setter(value); return
-        except Exception: pass
-    if hasattr(obj, name):
-        try: setattr(obj, name, value)
-        except Exception: pass
+        try: inspect.signature(setter).bind(None)
+        except (TypeError, ValueError): setter = None
+    else:
+        setter = None
+    cls = type(obj)
+    prop = getattr(cls, name, None)
+    writable = (hasattr(obj, name)
+                and not (isinstance(prop, property) and prop.fset is None)
+                and not getattr(getattr(cls, "__dataclass_params__", None), "frozen", False))
+    return name, setter, writable
 
+def _apply(obj: Any, name: str, value: Any) -> None:
+    """Set attribute via set_<name>() if present, else setattr if allowed."""
+    if value is None: return
+    _set(obj, _probe(obj, name), value)
 
-@dataclass
+def _setter_table(obj: Any, names: Iterable[str]) -> Dict[str, _Setter]:
+    """
+    _apply's probing done once per object: for each name it would act on, the bound setter and
+    whether setattr is allowed. Names _apply would ignore are left out.
+    """
+    table: Dict[str, _Setter] = {}
+    for name in names:
+        entry = _probe(obj, name)
+        if entry[1] is not None or entry[2]:
+            table[name] = entry
+    return table
+
+def _set(obj: Any, entry: Optional[_Setter], value: Any) -> None:
+    """_apply(obj, name, value) using a _setter_table entry (None = nothing to set)."""
+    if entry is None or value is None: return
+    name, setter, writable = entry
+    if setter is not None: setter(value)
+    elif writable: setattr(obj, name, value)
+
+
+@dataclass(slots=True)  # built per tick
 class TradeSignal:
     symbol: str
     action: str          # "BUY_CALL" | "BUY_PUT" | "EXIT" | "HOLD"
@@ -39,68 +74,79 @@ class TradeSignal:
 
 
 # ----------------------------- Trend helpers -----------------------------
-
-def derive_trend(price: float, ema9: float, ema20: float, sma20: float) -> str:
-    """Simple, readable trend heuristic. Customize as needed."""
-    if ema9 > ema20 > sma20 and price >= ema9:
-        return "uptrend"
-    if ema9 < ema20 < sma20 and price <= ema9:
-        return "downtrend"
-    return "neutral"
+# derive_trend (per tick) and trend_codes (NumPy/Numba kernel for whole arrays) live in trend_kernel
+from trend_kernel import derive_trend, trend_codes, TREND_NAMES
 
 
 # ----------------------------- Criteria (pluggable) -----------------------------
+# The comparisons live in criteria_core (plain scalar functions returning an int tag); these wrappers
+# only build the TradeSignal.
+import criteria_core
 
-# 1) Stacked MAs (EMA9>EMA20>SMA20 bullish; inverse bearish). Exit on reversal.
-def criteria_stacked(rec: dict, ind: "Indicator", asset: "DayTradeAsset", prev_trend: Optional[str]) -> "TradeSignal":
-    sym, price, ema9, ema20, sma20 = rec["symbol"], rec["price"], rec["ema9"], rec["ema20"], rec["sma20"]
-    trend = derive_trend(price, ema9, ema20, sma20)
+_TREND_CODE = {"uptrend": 1, "downtrend": -1}
 
-    if prev_trend and trend != prev_trend and prev_trend in {"uptrend", "downtrend"}:
-        return TradeSignal(sym, "EXIT", f"Trend reversed {prev_trend} -> {trend}", rec["ts"], price,
-                           {"trend": trend, "prev_trend": prev_trend})
+# The reversal reasons come from a closed set of trend names: build each text once, not per EXIT signal.
+# (Action names and the fixed reasons are literals, which CPython already shares.)
+_REASON_REVERSED = {(a, b): f"Trend reversed {a} -> {b}"
+                    for a in TREND_NAMES.values() for b in TREND_NAMES.values() if a != b}
+
+def _as_alert(rec: Any) -> "pa.Alert":
+    """
+    Records are positional (symbol, alert, price, sma20, ema20, ema9, ts) — the pa.Alert NamedTuple.
+    A dict would unpack its keys instead of its values, so convert it here.
+    """
+    return pa.Alert.from_dict(rec) if isinstance(rec, dict) else rec
 
-    if trend == "uptrend":
-        return TradeSignal(sym, "BUY_CALL", "Stacked bullish trend", rec["ts"], price,
+# 1) Stacked MAs (EMA9>EMA20>SMA20 bullish; inverse bearish). Exit on reversal.
+def criteria_stacked(rec: "pa.Alert", ind: "Indicator", asset: "DayTradeAsset", prev_trend: Optional[str],
+                     derived_trend: Optional[str] = None) -> "TradeSignal":
+    rec = _as_alert(rec)
+    sym, _, price, sma20, ema20, ema9, ts = rec
+    prev = _TREND_CODE.get(prev_trend, 0)
+    if derived_trend is not None:  # derive_trend already ran on these values (see _on_update)
+        tag = criteria_core.stacked_action(_TREND_CODE.get(derived_trend, 0), prev)
+    else:
+        tag = criteria_core.stacked(price, ema9, ema20, sma20, prev)
+    action, t = criteria_core.decode(tag)
+    trend = TREND_NAMES[t]
+
+    if action == "EXIT":
+        reason = _REASON_REVERSED.get((prev_trend, trend)) or f"Trend reversed {prev_trend} -> {trend}"
+        return TradeSignal(sym, "EXIT", reason, ts, price,
+                           {"trend": trend, "prev_trend": prev_trend})
+    if action == "BUY_CALL":
+        return TradeSignal(sym, "BUY_CALL", "Stacked bullish trend", ts, price,
                            {"trend": trend})
-    if trend == "downtrend":
-        return TradeSignal(sym, "BUY_PUT", "Stacked bearish trend", rec["ts"], price,
+    if action == "BUY_PUT":
+        return TradeSignal(sym, "BUY_PUT", "Stacked bearish trend", ts, price,
                            {"trend": trend})
-    return TradeSignal(sym, "HOLD", "Neutral trend", rec["ts"], price, {"trend": trend})
+    return TradeSignal(sym, "HOLD", "Neutral trend", ts, price, {"trend": trend})
 
 
 # 2) EMA crossover (9/20) with SMA20 as higher-timeframe filter. Exit on opposite cross.
-def criteria_crossover(rec: dict, ind: "Indicator", asset: "DayTradeAsset", prev_trend: Optional[str]) -> "TradeSignal":
-    sym, price, ema9, ema20, sma20 = rec["symbol"], rec["price"], rec["ema9"], rec["ema20"], rec["sma20"]
-    # Infer "signal" from last two EMA points if available; fall back to level check
-    # (Indicator series are assumed to have .values or behave like lists)
-    # We won't mutate Indicator; we just read.
-    try:
-        # Try to detect cross using the previous bar if present
-        ema9_prev = ind.ema9.values[-2] if hasattr(ind.ema9, "values") and len(ind.ema9.values) >= 2 else None  # type: ignore
-        ema20_prev = ind.ema20.values[-2] if hasattr(ind.ema20, "values") and len(ind.ema20.values) >= 2 else None  # type: ignore
-    except Exception:
-        ema9_prev = ema20_prev = None
-
-    bullish_now = ema9 > ema20 and price >= sma20
-    bearish_now = ema9 < ema20 and price <= sma20
-
-    crossed_up = ema9_prev is not None and ema20_prev is not None and ema9_prev <= ema20_prev and ema9 > ema20
-    crossed_dn = ema9_prev is not None and ema20_prev is not None and ema9_prev >= ema20_prev and ema9 < ema20
-
-    if crossed_up and bullish_now:
-        return TradeSignal(sym, "BUY_CALL", "EMA9 crossed above EMA20 (filtered by SMA20)", rec["ts"], price, {})
-    if crossed_dn and bearish_now:
-        return TradeSignal(sym, "BUY_PUT", "EMA9 crossed below EMA20 (filtered by SMA20)", rec["ts"], price, {})
-
-    # Exit if cross the other way relative to prior trend
-    if prev_trend == "uptrend" and bearish_now:
-        return TradeSignal(sym, "EXIT", "Bullish -> bearish regime shift", rec["ts"], price, {})
-    if prev_trend == "downtrend" and bullish_now:
-        return TradeSignal(sym, "EXIT", "Bearish -> bullish regime shift", rec["ts"], price, {})
-
-    trend = "uptrend" if bullish_now else "downtrend" if bearish_now else "neutral"
-    return TradeSignal(sym, "HOLD", "No actionable cross", rec["ts"], price, {"trend": trend})
+def criteria_crossover(rec: "pa.Alert", ind: "Indicator", asset: "DayTradeAsset", prev_trend: Optional[str]) -> "TradeSignal":
+    rec = _as_alert(rec)
+    sym, _, price, sma20, ema20, ema9, ts = rec
+    # Detect the cross against the previous bar when the Indicator has one; we only read it.
+    ema9_prev, ema20_prev = ind.prev_pair()
+    has_prev = ema9_prev is not None
+    if not has_prev: ema9_prev = ema20_prev = 0.0
+
+    tag = criteria_core.crossover(price, ema9, ema20, sma20, ema9_prev, ema20_prev, int(has_prev),
+                                  _TREND_CODE.get(prev_trend, 0))
+    action, t = criteria_core.decode(tag)
+
+    if action == "BUY_CALL":
+        return TradeSignal(sym, "BUY_CALL", "EMA9 crossed above EMA20 (filtered by SMA20)", ts, price, {})
+    if action == "BUY_PUT":
+        return TradeSignal(sym, "BUY_PUT", "EMA9 crossed below EMA20 (filtered by SMA20)", ts, price, {})
+    if action == "EXIT":
+        # Exit if cross the other way relative to prior trend
+        if prev_trend == "uptrend":
+            return TradeSignal(sym, "EXIT", "Bullish -> bearish regime shift", ts, price, {})
+        return TradeSignal(sym, "EXIT", "Bearish -> bullish regime shift", ts, price, {})
+
+    return TradeSignal(sym, "HOLD", "No actionable cross", ts, price, {"trend": TREND_NAMES[t]})
 
 
 # ----------------------------- Runner -----------------------------
@@ -108,8 +154,8 @@ def criteria_crossover(rec: dict, ind: "Indicator", asset: "DayTradeAsset", prev
 def run_streaming_trader(
     symbols: List[str],
     assets_by_symbol: Dict[str, "DayTradeAsset"],
-    criteria: Callable[[dict, "Indicator", "DayTradeAsset", Optional[str]], "TradeSignal"] = criteria_stacked,
-    on_signal: Optional[Callable[["TradeSignal", "DayTradeAsset", "Indicator", dict], None]] = None,
+    criteria: Callable[["pa.Alert", "Indicator", "DayTradeAsset", Optional[str]], "TradeSignal"] = criteria_stacked,
+    on_signal: Optional[Callable[["TradeSignal", "DayTradeAsset", "Indicator", "pa.Alert"], None]] = None,
     date_suffix: Optional[str] = None,
     interval_override: Optional[float] = None,
 ) -> None:
@@ -132,37 +178,58 @@ def run_streaming_trader(
     # We'll track last trend to generate clean EXIT on reversals.
     last_trend: Dict[str, str] = {}
 
-    def _update_asset_from_rec(asset: DayTradeAsset, rec: dict, trend: Optional[str]) -> None:
+    # criteria that take derived_trend get the trend _on_update already computed instead of re-deriving it
+    try:
+        params = inspect.signature(criteria).parameters
+        pass_trend = "derived_trend" in params or any(p.kind is p.VAR_KEYWORD for p in params.values())
+    except (TypeError, ValueError):
+        pass_trend = False
+
+    # per-symbol setter tables, built on an asset's first update (see _setter_table)
+    setters: Dict[str, Dict[str, _Setter]] = {}
+    asset_fields = ("last_price", "price", "sma20", "ema20", "ema9", "trend", "previous_trend")
+
+    def _update_asset_from_rec(asset: DayTradeAsset, table: Dict[str, _Setter], price: float, sma20: float,
+                               ema20: float, ema9: float, trend: Optional[str]) -> None:
         # Push latest numbers onto the asset if fields/methods exist. No class changes required.
-        _apply(asset, "last_price", rec["price"])
-        _apply(asset, "price", rec["price"])
-        _apply(asset, "sma20", rec["sma20"])
-        _apply(asset, "ema20", rec["ema20"])
-        _apply(asset, "ema9", rec["ema9"])
+        get = table.get
+        _set(asset, get("last_price"), price)
+        _set(asset, get("price"), price)
+        _set(asset, get("sma20"), sma20)
+        _set(asset, get("ema20"), ema20)
+        _set(asset, get("ema9"), ema9)
         if trend is not None:
             # Respect your existing naming if present
-            _apply(asset, "trend", trend)
+            _set(asset, get("trend"), trend)
             # Preserve previous trend if supported
-            if hasattr(asset, "previous_trend"):
-                try:
-                    prev = getattr(asset, "trend", None)
-                    if prev and prev != trend:
-                        _apply(asset, "previous_trend", prev)
-                except Exception:
-                    pass
-
-    def _on_update(sym: str, ind: Indicator, rec: dict) -> None:
+            prev_entry = get("previous_trend")
+            if prev_entry is not None and prev_entry[2]:
+                prev = getattr(asset, "trend", None)
+                if prev and prev != trend:
+                    _set(asset, prev_entry, prev)
+
+    def _on_update(sym: str, ind: Indicator, rec: pa.Alert) -> None:
         SYM = sym.upper()
         asset = assets_by_symbol.get(SYM)
         if asset is None:
             return  # symbol not in your watchlist, skip
 
+        # rec is a price_alerts.Alert (a tuple): unpack once instead of a rec["..."] lookup per field
+        rec = _as_alert(rec)
+        _, _, price, sma20, ema20, ema9, _ = rec
+
         # Decide trend (for logging / asset update convenience)
-        trend = derive_trend(rec["price"], rec["ema9"], rec["ema20"], rec["sma20"])
-        _update_asset_from_rec(asset, rec, trend)
+        trend = derive_trend(price, ema9, ema20, sma20)
+        table = setters.get(SYM)
+        if table is None:
+            table = setters[SYM] = _setter_table(asset, asset_fields)
+        _update_asset_from_rec(asset, table, price, sma20, ema20, ema9, trend)
 
         # Build signal with your chosen criteria
-        signal = criteria(rec, ind, asset, last_trend.get(SYM))
+        if pass_trend:
+            signal = criteria(rec, ind, asset, last_trend.get(SYM), derived_trend=trend)
+        else:
+            signal = criteria(rec, ind, asset, last_trend.get(SYM))
 
         # Update last_trend from signal.extras/trend if any
         if signal.action != "HOLD":
@@ -185,7 +252,7 @@ def run_streaming_trader(
 
 # ----------------------------- Example callback -----------------------------
 
-def print_signal(signal: "TradeSignal", asset: "DayTradeAsset", ind: "Indicator", rec: dict) -> None:
+def print_signal(signal: "TradeSignal", asset: "DayTradeAsset", ind: "Indicator", rec: "pa.Alert") -> None:
     """
     Default on_signal callback that just logs.
     Replace this with an executor that places/cancels orders via your broker.
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# test_criteria.py
+# Checks stream_trader's criteria (criteria_core tags + Indicator.prev_pair) give the same TradeSignal as the
+# original dict-based criteria, on random records with 0-3 bars of Indicator history:
+#     python test_criteria.py
+import random, sys
+from datetime import datetime
+
+import price_alerts as pa
+import stream_trader as st
+from indicators import Indicator
+
+def derive_trend(price, ema9, ema20, sma20):
+    if ema9 > ema20 > sma20 and price >= ema9: return "uptrend"
+    if ema9 < ema20 < sma20 and price <= ema9: return "downtrend"
+    return "neutral"
+
+# ---- the original criteria, for reference ----
+def reference_stacked(rec, ind, asset, prev_trend):
+    sym, price, ema9, ema20, sma20 = rec["symbol"], rec["price"], rec["ema9"], rec["ema20"], rec["sma20"]
+    trend = derive_trend(price, ema9, ema20, sma20)
+    if prev_trend and trend != prev_trend and prev_trend in {"uptrend", "downtrend"}:
+        return st.TradeSignal(sym, "EXIT", f"Trend reversed {prev_trend} -> {trend}", rec["ts"], price,
+                              {"trend": trend, "prev_trend": prev_trend})
+    if trend == "uptrend":
+        return st.TradeSignal(sym, "BUY_CALL", "Stacked bullish trend", rec["ts"], price, {"trend": trend})
+    if trend == "downtrend":
+        return st.TradeSignal(sym, "BUY_PUT", "Stacked bearish trend", rec["ts"], price, {"trend": trend})
+    return st.TradeSignal(sym, "HOLD", "Neutral trend", rec["ts"], price, {"trend": trend})
+
+def reference_crossover(rec, ind, asset, prev_trend):
+    sym, price, ema9, ema20, sma20 = rec["symbol"], rec["price"], rec["ema9"], rec["ema20"], rec["sma20"]
+    ema9_prev = ind.ema9.values[-2] if len(ind.ema9.values) >= 2 else None
+    ema20_prev = ind.ema20.values[-2] if len(ind.ema20.values) >= 2 else None
+    bullish_now = ema9 > ema20 and price >= sma20
+    bearish_now = ema9 < ema20 and price <= sma20
+    crossed_up = ema9_prev is not None and ema20_prev is not None and ema9_prev <= ema20_prev and ema9 > ema20
+    crossed_dn = ema9_prev is not None and ema20_prev is not None and ema9_prev >= ema20_prev and ema9 < ema20
+    if crossed_up and bullish_now:
+        return st.TradeSignal(sym, "BUY_CALL", "EMA9 crossed above EMA20 (filtered by SMA20)", rec["ts"], price, {})
+    if crossed_dn and bearish_now:
+        return st.TradeSignal(sym, "BUY_PUT", "EMA9 crossed below EMA20 (filtered by SMA20)", rec["ts"], price, {})
+    if prev_trend == "uptrend" and bearish_now:
+        return st.TradeSignal(sym, "EXIT", "Bullish -> bearish regime shift", rec["ts"], price, {})
+    if prev_trend == "downtrend" and bullish_now:
+        return st.TradeSignal(sym, "EXIT", "Bearish -> bullish regime shift", rec["ts"], price, {})
+    trend = "uptrend" if bullish_now else "downtrend" if bearish_now else "neutral"
+    return st.TradeSignal(sym, "HOLD", "No actionable cross", rec["ts"], price, {"trend": trend})
+
+def random_case(rng: random.Random):
+    """(Alert, Indicator, prev_trend); small integer levels so ties and crosses come up often."""
+    level = lambda: float(rng.randint(1, 4))
+    ts = datetime(2025, 8, 21, 9, 30)
+    ind = Indicator()
+    bars = [(level(), level(), level(), level()) for _ in range(rng.randint(0, 3))]
+    for price, sma20, ema20, ema9 in bars:  # the newest bar is the record itself, as the streamer feeds it
+        for series, v in ((ind.price, price), (ind.sma20, sma20), (ind.ema20, ema20), (ind.ema9, ema9)):
+            series.update(v, ts)
+    price, sma20, ema20, ema9 = bars[-1] if bars else (level(), level(), level(), level())
+    rec = pa.Alert("AAPL", 1, price, sma20, ema20, ema9, ts)
+    return rec, ind, rng.choice([None, "uptrend", "downtrend", "neutral"])
+
+def main() -> int:
+    rng = random.Random(20250821)
+    n, bad = 20_000, []
+    for _ in range(n):
+        rec, ind, prev = random_case(rng)
+        as_dict = rec._asdict()
+        trend = derive_trend(rec.price, rec.ema9, rec.ema20, rec.sma20)
+        pairs = [
+            ("stacked", st.criteria_stacked(rec, ind, None, prev), reference_stacked(as_dict, ind, None, prev)),
+            ("stacked, derived trend", st.criteria_stacked(rec, ind, None, prev, derived_trend=trend),
+             reference_stacked(as_dict, ind, None, prev)),
+            ("stacked, dict record", st.criteria_stacked(as_dict, ind, None, prev), reference_stacked(as_dict, ind, None, prev)),
+            ("crossover", st.criteria_crossover(rec, ind, None, prev), reference_crossover(as_dict, ind, None, prev)),
+        ]
+        bad += [(name, rec, len(ind.ema9), prev, got, want) for name, got, want in pairs if got != want]
+    for name, rec, bars, prev, got, want in bad[:10]:
+        print(f"FAIL: {name}: {tuple(rec)[2:6]} bars={bars} prev={prev}: got {got}, want {want}")
+    print(f"{'OK' if not bad else 'FAIL'}: {4 * n - len(bad)}/{4 * n} criteria signals match the original criteria")
+    return 1 if bad else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
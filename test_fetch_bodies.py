@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# test_fetch_bodies.py
+# Feeds price_alerts.fetch_message_bodies the FETCH reply shapes imaplib hands back and checks each body
+# lands under its own UID; also checks a UID the server keeps leaving out is given up on:
+#     python test_fetch_bodies.py
+import base64, os, sys, tempfile
+
+import price_alerts as pa
+
+_HDR = b" BODY[HEADER.FIELDS (CONTENT-TYPE CONTENT-TRANSFER-ENCODING)] {%d}"
+PLAIN = b"Content-Type: text/plain; charset=utf-8\r\n\r\n"
+B64 = b"Content-Type: text/plain; charset=utf-8\r\nContent-Transfer-Encoding: base64\r\n\r\n"
+
+class FakeImap:
+    """Just enough of IMAP4 for fetch_message_bodies: uid() returns one canned FETCH reply."""
+    def __init__(self, data, status="OK"):
+        self.data, self.status = data, status
+    def uid(self, *args):
+        return self.status, self.data
+
+CASES = [
+    ("literals, UID first", [
+        (b"1 (UID 5 BODY[TEXT] {5}", b"hello"), (_HDR % len(PLAIN), PLAIN), b")",
+     ], [b"5"], {b"5": "hello"}),
+    ("reordered items, UID last", [
+        (b"2 (BODY[HEADER.FIELDS (CONTENT-TYPE CONTENT-TRANSFER-ENCODING)] {%d}" % len(B64), B64),
+        (b" BODY[TEXT] {8}", base64.b64encode(b"world!")), b" UID 6)",
+     ], [b"6"], {b"6": "world!"}),
+    ("quoted body with a UID inside it", [
+        (b"3 (UID 7" + _HDR % len(PLAIN), PLAIN), b' BODY[TEXT] "quoted UID 9 \\"x\\"")',
+     ], [b"7"], {b"7": 'quoted UID 9 "x"'}),
+    ("no seq prefix: new UID starts a new message", [
+        (b"(UID 10 BODY[TEXT] {3}", b"one"), (_HDR % len(PLAIN), PLAIN), b")",
+        (b"(UID 11 BODY[TEXT] {3}", b"two"), (_HDR % len(PLAIN), PLAIN), b")",
+     ], [b"10", b"11"], {b"10": "one", b"11": "two"}),
+    ("several messages in one reply", [
+        (b"1 (UID 20 BODY[TEXT] {1}", b"a"), (_HDR % len(PLAIN), PLAIN), b")",
+        (b"2 (BODY[HEADER.FIELDS (CONTENT-TYPE CONTENT-TRANSFER-ENCODING)] {%d}" % len(PLAIN), PLAIN),
+        (b" BODY[TEXT] {1}", b"b"), b" UID 21)",
+        (b"3 (UID 22" + _HDR % len(PLAIN), PLAIN), b' BODY[TEXT] "c")',
+     ], [b"20", b"21", b"22"], {b"20": "a", b"21": "b", b"22": "c"}),
+    ("message left out of the reply", [
+        (b"1 (UID 30 BODY[TEXT] {1}", b"x"), (_HDR % len(PLAIN), PLAIN), b")",
+     ], [b"30", b"31"], {b"30": "x"}),
+]
+
+def check_give_up() -> bool:
+    # MAX_FETCH_ATTEMPTS misses in a row: the UID is marked processed and its miss count dropped
+    saved = pa.processed_uids
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        store = pa.processed_uids = pa.ProcessedUids(path)
+        misses = {}
+        calls = [pa._give_up(misses, "20250821", b"31") for _ in range(pa.MAX_FETCH_ATTEMPTS)]
+        ok = calls == [False] * (pa.MAX_FETCH_ATTEMPTS - 1) + [True] and not misses and store.seen("20250821", "31")
+        store._conn().close()
+        return ok
+    finally:
+        pa.processed_uids = saved
+        for p in (path, path + "-wal", path + "-shm"):
+            if os.path.exists(p): os.remove(p)
+
+def main() -> int:
+    failed = 0
+    for name, data, uids, want in CASES:
+        got = pa.fetch_message_bodies(FakeImap(data), uids)
+        ok = got == want
+        failed += not ok
+        print(f"{'OK' if ok else 'FAIL'}: {name}" + ("" if ok else f": got {got!r}, want {want!r}"))
+    ok = pa.fetch_message_bodies(FakeImap([None], status="NO"), [b"1"]) == {}
+    failed += not ok
+    print(f"{'OK' if ok else 'FAIL'}: failed FETCH returns no bodies")
+    ok = check_give_up()
+    failed += not ok
+    print(f"{'OK' if ok else 'FAIL'}: UID given up after {pa.MAX_FETCH_ATTEMPTS} missing fetches")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# test_handle_trend.py
+# Checks trends.handle_trend_batch reports the same trade bars, labels and final PositionState as calling
+# handle_trend bar by bar with a broker, on random trend sequences:
+#     python test_handle_trend.py
+import random, sys
+
+import numpy as np
+
+import trends
+from trends import HANDLE_ACTIONS, PositionState, handle_trend, handle_trend_batch
+
+class Broker:
+    """Counts calls: a bar where handle_trend calls the broker is a trade event."""
+    def __init__(self): self.calls = 0
+    def buy_call(self, symbol, qty, context): self.calls += 1
+    def buy_put(self, symbol, qty, context): self.calls += 1
+    def exit_position(self, symbol, context): self.calls += 1
+
+TREND = {1: "UP", -1: "DOWN", 0: None}
+
+def per_bar(codes: list, state: PositionState, reenter: bool):
+    broker, events = Broker(), []
+    for i, c in enumerate(codes):
+        before = broker.calls
+        label = handle_trend(TREND[c], state, "X", broker, reenter_on_reverse=reenter)
+        if broker.calls != before: events.append((i, label))
+    return events
+
+def main() -> int:
+    rng = random.Random(13)
+    n, bad = 3000, []
+    for _ in range(n):
+        codes = [rng.choice([1, -1, 0]) for _ in range(rng.randint(0, 30))]
+        side = rng.choice([None, "CALL", "PUT"])
+        reenter = rng.random() < 0.5
+        want_state = PositionState(side=side, last_trend="UP")
+        want = per_bar(codes, want_state, reenter)
+        got_state = PositionState(side=side, last_trend="UP")
+        idx, acts = handle_trend_batch(np.array(codes, dtype=np.int8), got_state, reenter_on_reverse=reenter)
+        got = [(int(i), HANDLE_ACTIONS[a]) for i, a in zip(idx, acts)]
+        if got != want or got_state != want_state: bad.append((codes, side, reenter, got, want, got_state, want_state))
+    for codes, side, reenter, got, want, gs, ws in bad[:5]:
+        print(f"FAIL: codes={codes} side={side} reenter={reenter}:\n  batch {got} {gs}\n  bars  {want} {ws}")
+    kernel = "numba" if trends.njit is not None else "python"
+    print(f"{'OK' if not bad else 'FAIL'}: {n - len(bad)}/{n} sequences replay like handle_trend ({kernel})")
+    return 1 if bad else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# test_imap_idle.py
+# Runs price_alerts.wait_for_new_mail against a scripted local IMAP server, over TCP and (when openssl
+# is on PATH) TLS, and checks the connection answers NOOP afterwards:
+#     python test_imap_idle.py
+import imaplib, os, shutil, socket, ssl, subprocess, sys, tempfile, threading, time
+
+import price_alerts as pa
+
+def serve(lsock: socket.socket, mode: str, tls: "ssl.SSLContext | None") -> None:
+    conn, _ = lsock.accept()
+    if tls is not None: conn = tls.wrap_socket(conn, server_side=True)
+    f = conn.makefile("rb")
+    conn.sendall(b"* OK ready\r\n")
+    idle_tag = b""
+    while True:
+        line = f.readline()
+        if not line: return
+        if line == b"DONE\r\n":
+            conn.sendall(b"* 4 EXISTS\r\n" + idle_tag + b" OK IDLE terminated\r\n")
+            continue
+        tag, cmd = line.split(b" ", 1)
+        cmd = cmd.strip().upper()
+        if cmd == b"CAPABILITY":
+            conn.sendall(b"* CAPABILITY IMAP4rev1 IDLE\r\n" + tag + b" OK done\r\n")
+        elif cmd == b"NOOP":
+            conn.sendall(b"* 9 RECENT\r\n" + tag + b" OK noop\r\n")
+        elif cmd == b"IDLE":
+            idle_tag = tag
+            if mode == "same_record":  # EXISTS in the same write as the continuation
+                conn.sendall(b"+ idling\r\n* 3 EXISTS\r\n")
+            elif mode == "later":
+                conn.sendall(b"+ idling\r\n"); time.sleep(0.3); conn.sendall(b"* 3 EXISTS\r\n")
+            elif mode == "eof":
+                conn.sendall(b"+ idling\r\n"); time.sleep(0.2)
+                conn.shutdown(socket.SHUT_RDWR); conn.close()
+                return
+            else:
+                conn.sendall(b"+ idling\r\n")
+        elif cmd == b"LOGOUT":
+            conn.sendall(b"* BYE\r\n" + tag + b" OK bye\r\n")
+            return
+
+def run(mode: str, tls: "tuple | None", timeout: float = 1.0, stop_after: "float | None" = None):
+    """(result, seconds, NOOP status) of one wait_for_new_mail; result is True/False or 'abort'."""
+    lsock = socket.socket(); lsock.bind(("127.0.0.1", 0)); lsock.listen(1)
+    threading.Thread(target=serve, args=(lsock, mode, tls and tls[0]), daemon=True).start()
+    port = lsock.getsockname()[1]
+    imap = imaplib.IMAP4_SSL("127.0.0.1", port, ssl_context=tls[1]) if tls else imaplib.IMAP4("127.0.0.1", port)
+    stop = threading.Event()
+    if stop_after is not None: threading.Timer(stop_after, stop.set).start()
+    t0 = time.monotonic()
+    try:
+        got = pa.wait_for_new_mail(imap, timeout, stop)
+    except imaplib.IMAP4.abort:
+        return "abort", time.monotonic() - t0, None
+    took = time.monotonic() - t0
+    status = imap.noop()[0]
+    imap.logout()
+    lsock.close()
+    return got, took, status
+
+def tls_contexts(tmp: str) -> "tuple | None":
+    if shutil.which("openssl") is None: return None
+    cert, key = os.path.join(tmp, "c.pem"), os.path.join(tmp, "k.pem")
+    subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-subj", "/CN=localhost",
+                    "-days", "1", "-keyout", key, "-out", cert], check=True, capture_output=True)
+    server = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER); server.load_cert_chain(cert, key)
+    client = ssl.create_default_context(); client.check_hostname = False; client.verify_mode = ssl.CERT_NONE
+    return server, client
+
+# mode, stop_after, check(result, seconds, noop status)
+CASES = [
+    ("same_record", None, lambda r, t, s: r is True and t < 0.5 and s == "OK"),
+    ("later", None, lambda r, t, s: r is True and 0.2 < t < 0.9 and s == "OK"),
+    ("quiet", None, lambda r, t, s: r is False and 0.9 < t < 1.5 and s == "OK"),  # the 1 s timeout
+    ("quiet", 0.2, lambda r, t, s: r is False and t < 0.9 and s == "OK"),         # stop event set
+    ("eof", None, lambda r, t, s: r == "abort"),
+]
+
+def main() -> int:
+    pa.IDLE_CHECK = 0.1  # notice the stop event quickly
+    failed = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        transports = [("tcp", None)]
+        tls = tls_contexts(tmp)
+        if tls is not None: transports.append(("tls", tls))
+        else: print("SKIP: tls (no openssl)")
+        for name, ctx in transports:
+            for mode, stop_after, check in CASES:
+                got, took, status = run(mode, ctx, stop_after=stop_after)
+                ok = check(got, took, status)
+                failed += not ok
+                label = mode + (" + stop" if stop_after is not None else "")
+                print(f"{'OK' if ok else 'FAIL'}: {name} {label}: {got} after {took:.2f}s, NOOP {status}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 import argparse, os, sys, time
+from operator import itemgetter
 from typing import TYPE_CHECKING, List, Optional
 
 # Import your helpers (they must exist in price_alerts.py as added earlier)
@@ -24,9 +25,16 @@ def parse_args() -> argparse.Namespace:
     return p.parse_args()
 
 
-def pretty_dump(rec: dict) -> str:
-    return (f"{rec['symbol']} ts={rec['ts']:%Y-%m-%d %H:%M:%S} "
-            f"price={rec['price']} sma20={rec['sma20']} ema20={rec['ema20']} ema9={rec['ema9']} alert={rec['alert']}")
+_GET = itemgetter("symbol", "ts", "price", "sma20", "ema20", "ema9", "alert")
+_FMT = "%s ts=%s price=%s sma20=%s ema20=%s ema9=%s alert=%s"
+
+def pretty_dump(rec: "pa.Alert | dict") -> str:
+    # one unpack + one %-format per tick instead of seven rec[...] lookups
+    if isinstance(rec, tuple): sym, alert, price, sma20, ema20, ema9, ts = rec  # pa.Alert field order
+    else: sym, ts, price, sma20, ema20, ema9, alert = _GET(rec)
+    # isoformat(" ", "seconds") is strftime("%Y-%m-%d %H:%M:%S") for naive datetimes, ~3x cheaper
+    stamp = ts.isoformat(" ", "seconds") if ts.tzinfo is None else ts.strftime("%Y-%m-%d %H:%M:%S")
+    return _FMT % (sym, stamp, price, sma20, ema20, ema9, alert)
 
 
 def read_once(symbols: List[str], date_suffix: Optional[str]) -> None:
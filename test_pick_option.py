@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# test_pick_option.py
+# Checks Stock.pick_option_vec picks the same contract (same fields, same filled-in mark) as pick_option,
+# on random chains with missing quotes/deltas/DTEs, every price policy and debit cap:
+#     python test_pick_option.py
+import random, sys
+
+import numpy as np
+
+from stocks import Stock
+
+def random_chain(rng: random.Random, n: int) -> list:
+    maybe = lambda v, p: None if rng.random() < p else v
+    rows = []
+    for i in range(n):
+        bid = round(rng.uniform(0, 5), 2)
+        rows.append({
+            "expiry": "2025-09-19", "strike": float(100 + i % 50), "right": rng.choice("CP"),
+            "dte": maybe(rng.choice([0, 1, 2, 7, 30]), 0.2),
+            "bid": bid, "ask": maybe(round(bid + rng.uniform(0, 1), 2), 0.2),
+            "mark": maybe(round(rng.uniform(0, 5), 2), 0.3), "last": round(rng.uniform(0, 5), 2),
+            "delta": maybe(round(rng.uniform(-1, 1), 2), 0.1),
+        })
+    return rows
+
+def columns(rows: list) -> dict:
+    """The same chain as a dict of arrays; None becomes NaN."""
+    out = {}
+    for k in rows[0]:
+        if k in ("expiry", "right"): out[k] = np.array([r[k] for r in rows])
+        else: out[k] = np.array([np.nan if r[k] is None else r[k] for r in rows], dtype=float)
+    return out
+
+def main() -> int:
+    rng = random.Random(5)
+    n, bad = 2000, []
+    for _ in range(n):
+        stock = Stock("SPY", opt_price_policy=rng.choice(["MID", "BID", "ASK", "MARK", "LAST"]))
+        rows = random_chain(rng, rng.randint(1, 40))
+        kw = dict(right=rng.choice("CP"), prefer_dte=rng.choice([0, 3, 10]), max_debit=rng.choice([None, 1.0, 2.5]),
+                  target_delta=rng.choice([None, 0.5]))
+        want = stock.pick_option([dict(r) for r in rows], **kw)
+        got = stock.pick_option_vec(columns(rows), **kw)
+        if repr(got) != repr(want): bad.append((kw, got, want))
+    for kw, got, want in bad[:5]:
+        print(f"FAIL: {kw}:\n  vec  {got}\n  list {want}")
+    print(f"{'OK' if not bad else 'FAIL'}: {n - len(bad)}/{n} chains pick the same contract")
+    return 1 if bad else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
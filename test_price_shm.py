@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# test_price_shm.py
+# Restarts a price_shm writer under a live reader and checks the reader follows the new segment:
+#     python test_price_shm.py
+import os, subprocess, sys
+
+import price_shm
+
+SYMBOL = f"ZZ{os.getpid()}"
+TS = "20250821093000"
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# publishes one price, then holds the segment until its stdin closes (atexit unlinks it)
+_WRITER = (
+    "import sys, price_shm\n"
+    "price_shm.publish(sys.argv[1], 1, float(sys.argv[2]), 1.0, 1.0, 1.0, sys.argv[3])\n"
+    "print('ready', flush=True)\n"
+    "sys.stdin.read()\n"
+)
+
+def start_writer(price: float) -> subprocess.Popen:
+    p = subprocess.Popen([sys.executable, "-c", _WRITER, SYMBOL, str(price), TS], cwd=HERE,
+                         stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    assert p.stdout.readline().strip() == "ready", p.stderr.read()
+    return p
+
+def stop_writer(p: subprocess.Popen) -> str:
+    _, err = p.communicate()
+    return err
+
+def price() -> object:
+    rec = price_shm.read_latest(SYMBOL)
+    return rec and rec["price"]
+
+def main() -> int:
+    checks = []
+    a = start_writer(1.0)
+    checks.append(("first writer", price(), 1.0))
+    stop_writer(a)
+    checks.append(("writer gone", price(), None))
+    b = start_writer(2.0)
+    checks.append(("writer back", price(), 2.0))
+    stop_writer(b)
+    c = start_writer(3.0)  # replaced between two reads: the old mapping still holds 2.0
+    checks.append(("writer restarted", price(), 3.0))
+    stop_writer(c)
+
+    # reader and writer in one process (in-process monitor): no resource_tracker complaint at exit
+    own = subprocess.run([sys.executable, "-c",
+                          f"import price_shm as m; m.publish('{SYMBOL}', 1, 4.0, 1, 1, 1, '{TS}'); "
+                          f"print(m.read_latest('{SYMBOL}')['price'])"],
+                         cwd=HERE, capture_output=True, text=True)
+    checks.append(("same process", (own.stdout.strip(), own.stderr.strip()), ("4.0", "")))
+
+    failed = [(name, got, want) for name, got, want in checks if got != want]
+    for name, got, want in failed:
+        print(f"FAIL: {name}: got {got!r}, want {want!r}")
+    print(f"{'OK' if not failed else 'FAIL'}: {len(checks) - len(failed)}/{len(checks)} shared-memory checks")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
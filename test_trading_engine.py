@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# test_trading_engine.py
+# Checks TradingEngine.evaluate_trade (driven by the SIDES table) makes the same manager calls and alerts
+# as the original per-direction if/elif branches, over a grid of ticks and SymbolInfo states:
+#     python test_trading_engine.py
+import contextlib, io, itertools, sys, types
+
+# price_tracker / webhooks / symbol_info live outside this tree: stand-ins so the engine imports; the
+# alert sender is replaced below either way, so no webhook is ever called
+for _name, _attrs in (("src.common.price_tracker", {"FilePriceTracker": object}),
+                      ("src.common.webhooks", {"send_trade_alert_by_sentiment": None}),
+                      ("src.common.symbol_info", {"SymbolInfo": object, "SymbolInfoManager": object})):
+    try: __import__(_name)
+    except ImportError: sys.modules[_name] = types.SimpleNamespace(**_attrs)
+
+import src.common.trading_engine as te
+
+calls: list = []
+def send_alert(**kw) -> None: calls.append(("alert", tuple(sorted(kw.items()))))
+
+class Info:
+    def __init__(self, **kw): self.__dict__.update(kw)
+    def get_webhook_url(self) -> str: return "https://hook"
+
+class Manager:
+    """Logs every update_* call; update_is_blocked blocks the symbol from its `block_after`-th call on."""
+    def __init__(self, info: Info, block_after: int):
+        self.info, self.block_after, self.blocks = info, block_after, 0
+    def get_info(self, symbol: str) -> Info: return self.info
+    def __getattr__(self, name: str):
+        def update(*args):
+            calls.append((name, args))
+            if name == "update_is_blocked":
+                self.blocks += 1
+                if self.blocks >= self.block_after: self.info.is_blocked = True
+        return update
+
+class Tracker:
+    def __init__(self, new: float, old: float): self.new, self.old = new, old
+    def price_changed(self, symbol: str) -> bool: return True
+    def current_price(self, symbol: str) -> float: return self.new
+    def previous_price(self, symbol: str) -> float: return self.old
+
+def reference_evaluate(self, symbol: str) -> None:
+    """evaluate_trade's trade section as it was before SIDES: one branch per tick direction."""
+    new_price = self.price_tracker.current_price(symbol)
+    old_price = self.price_tracker.previous_price(symbol) or 0.0
+    info = self.manager.get_info(symbol)
+    self.manager.update_current_price(symbol, new_price)
+    if info.unrealized_pnl >= 2:
+        self.manager.update_realized_pnl(symbol)
+        self.manager.set_unrealized_pnl(symbol, 0)
+        self.manager.update_is_blocked(symbol)
+        return
+    if info.is_blocked:
+        return
+    webhook, qty, ticker = info.get_webhook_url(), info.trade_quantity, info.symbol
+    for up, side, next_side, sentiment in ((True, "buy", "sell", "bullish"), (False, "sell", "buy", "bearish")):
+        if old_price == 0 or not (new_price > old_price if up else new_price < old_price):
+            continue
+        if not up:
+            self.manager.update_is_blocked(symbol)
+        if info.last_trade_side != side and info.expected_trade_side == side:
+            send_alert(webhook_url=webhook, ticker=ticker, action=side, sentiment=sentiment, quantity=qty)
+            self.manager.update_realized_pnl(symbol)
+            self.manager.update_trade_count(symbol)
+            self.manager.update_last_trade_price(symbol, new_price)
+            self.manager.update_unrealized_pnl(symbol)
+            self.manager.update_last_trade_side(symbol, side)
+            self.manager.update_expected_trade_side(symbol, next_side)
+            self.manager.update_is_blocked(symbol)
+            info = self.manager.get_info(symbol)
+            if info.is_blocked:
+                send_alert(webhook_url=webhook, ticker=ticker, action="exit")
+        else:
+            self.manager.update_unrealized_pnl(symbol)
+            self.manager.update_last_trade_side(symbol, side)
+        break
+
+def run(evaluate, new, old, last, expected, upnl, blocked, block_after) -> list:
+    del calls[:]
+    engine = object.__new__(te.TradingEngine)
+    engine.manager = Manager(Info(unrealized_pnl=upnl, is_blocked=blocked, trade_quantity=1, symbol="X",
+                                  last_trade_side=last, expected_trade_side=expected, realized_pnl=0), block_after)
+    engine.price_tracker = Tracker(new, old)
+    with contextlib.redirect_stdout(io.StringIO()):
+        evaluate(engine, "X")
+    return list(calls)
+
+def main() -> int:
+    te.send_trade_alert_by_sentiment = send_alert
+    grid = list(itertools.product([1.0, 2.0, 2.000001, 3.0], [0.0, 2.0], ["buy", "sell", None], ["buy", "sell"],
+                                  [0, 5], [False, True], [1, 2, 99]))
+    bad = [args for args in grid if run(te.TradingEngine.evaluate_trade, *args) != run(reference_evaluate, *args)]
+    for args in bad[:10]:
+        print(f"FAIL: new, old, last, expected, upnl, blocked, block_after = {args}")
+    print(f"{'OK' if not bad else 'FAIL'}: {len(grid) - len(bad)}/{len(grid)} evaluate_trade cases match the branches")
+    return 1 if bad else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
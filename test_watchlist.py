@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# test_watchlist.py
+# Round-trips a small watchlist through Stock.save_watchlist / Stock.load_watchlist:
+#     python test_watchlist.py
+import math, os, sys, tempfile
+
+import stocks
+from stocks import Stock
+
+def _same(a: dict, b: dict) -> bool:
+    # NaN != NaN, so compare those fields by isnan
+    return a.keys() == b.keys() and all(
+        x == y or (isinstance(x, float) and isinstance(y, float) and math.isnan(x) and math.isnan(y))
+        for x, y in zip(a.values(), (b[k] for k in a)))
+
+def round_trip(items: list) -> list:
+    fd, path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    try:
+        Stock.save_watchlist(items, path)
+        return Stock.load_watchlist(path)
+    finally:
+        os.remove(path)
+
+def main() -> int:
+    items = [
+        Stock("AAPL", name="Apple", tags=["tech", "mega"], last=189.42, atr=2.1, trend="UP"),
+        Stock("BRK.B", tick_size=0.01, lot_size=10, notes="value", previous_trend="DOWN"),
+        Stock("NVDA", notes="caf\u00e9", atr=float("nan"), vwap=float("nan"), last=1e-7, ask=float("inf")),
+    ]
+    items[0].touch()
+    failed = 0
+    # every parser that is installed, then the json fallback
+    for name in ("ijson", "orjson", "json"):
+        if name != "json" and getattr(stocks, name) is None: continue
+        saved = stocks.ijson, stocks.orjson
+        if name != "ijson": stocks.ijson = None
+        if name == "json": stocks.orjson = None
+        try: loaded = round_trip(items)
+        finally: stocks.ijson, stocks.orjson = saved
+        ok = [type(s) for s in loaded] == [Stock] * len(items) and all(_same(a.to_dict(), b.to_dict()) for a, b in zip(loaded, items))
+        ok = ok and type(loaded[0].updated_at) is int  # held as unix ms, whatever the file spells
+        failed += not ok
+        print(f"{'OK' if ok else 'FAIL'}: {len(loaded)} item(s) round-tripped ({name})")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,15 +3,24 @@ from dataclasses import dataclass, field, asdict
 from typing import Optional, Dict, Any
 from indicators import Indicator
 from dataclasses import dataclass, field, asdict
-from typing import TYPE_CHECKING, Optional, Dict, Any
+from typing import TYPE_CHECKING, Optional, Dict, Any, Tuple
+import json
+
+try:
+    # optional: orjson serializes to_log_json's row several times faster than json
+    import orjson
+except ImportError:
+    orjson = None
 
 if TYPE_CHECKING:
     from stocks import Stock                  # adjust path to your actual module
     from stock_config import StockConfig      # adjust path to your actual module
 
-@dataclass
+# to_log's keys, in the order of the row to_log_json writes
+_LOG_KEYS = ("symbol", "qty", "entry_price", "last_price", "pnl", "sma20", "ema20", "ema9")
+
+@dataclass(slots=True)
 class DayTradeAsset:
-    # __slots__ = ("stock","config","qty","entry_price","last_price","trend","previous_trend")  # include all fields you define
     stock: "Stock"
     config: "StockConfig"
     indicators: Indicator = field(default_factory=Indicator)
@@ -20,6 +29,10 @@ class DayTradeAsset:
     last_price: Optional[float] = None
     trend: str | None = None
     previous_trend: str | None = None
+    # the last log row and the (last_price, qty, entry_price, indicators.version) it was built from
+    _log_key: Optional[tuple] = field(default=None, init=False, repr=False, compare=False)
+    _log_row: Optional[tuple] = field(default=None, init=False, repr=False, compare=False)
+    _log: Optional[Dict[str, Any]] = field(default=None, init=False, repr=False, compare=False)  # to_log's dict of it
 
     @property
     def symbol(self) -> str: return self.stock.symbol
@@ -33,8 +46,22 @@ class DayTradeAsset:
         if price <= 0: raise ValueError("Price must be positive")
         self.last_price = price
 
+    def log_row(self) -> Tuple[Any, ...]:
+        """to_log's values in _LOG_KEYS order; rebuilt only when a price/position field or an indicator series changed."""
+        ind = self.indicators
+        key = (self.last_price, self.qty, self.entry_price, ind.version)
+        if key != self._log_key:
+            self._log_row = (self.symbol, self.qty, self.entry_price, self.last_price, self.pnl,
+                             ind.sma20.current(), ind.ema20.current(), ind.ema9.current())
+            self._log_key = key; self._log = None
+        return self._log_row
+
     def to_log(self) -> Dict[str, Any]:
-        return {
-            "symbol": self.symbol, "qty": self.qty, "entry_price": self.entry_price, "last_price": self.last_price, "pnl": self.pnl,
-            "sma20": self.indicators.sma20.current(), "ema20": self.indicators.ema20.current(), "ema9": self.indicators.ema9.current()
-        }
\ No newline at end of file
+        row = self.log_row()
+        if self._log is None: self._log = dict(zip(_LOG_KEYS, row))  # built once per row; callers get their own copy
+        return self._log.copy()
+
+    def to_log_json(self) -> bytes:
+        """log_row() as a JSON array (columns: _LOG_KEYS), straight from the tuple."""
+        if orjson is not None: return orjson.dumps(self.log_row())
+        return json.dumps(self.log_row(), separators=(",", ":")).encode()
\ No newline at end of file
@@ -0,0 +1,49 @@
+# trend_kernel.py
+# Stacked-MA trend classification, per tick (derive_trend) and over whole arrays (trend_codes).
+from __future__ import annotations
+
+import numpy as np
+
+try:
+    # optional: Numba compiles the array kernel to a native loop; NumPy's vectorized form otherwise
+    from numba import njit
+except ImportError:
+    njit = None
+
+NEUTRAL, UP, DOWN = 0, 1, -1
+TREND_NAMES = {UP: "uptrend", DOWN: "downtrend", NEUTRAL: "neutral"}
+
+def derive_trend(price: float, ema9: float, ema20: float, sma20: float) -> str:
+    """Simple, readable trend heuristic. Customize as needed."""
+    if ema9 > ema20 > sma20 and price >= ema9:
+        return "uptrend"
+    if ema9 < ema20 < sma20 and price <= ema9:
+        return "downtrend"
+    return "neutral"
+
+def _trend_codes_np(price: np.ndarray, ema9: np.ndarray, ema20: np.ndarray, sma20: np.ndarray) -> np.ndarray:
+    up = (ema9 > ema20) & (ema20 > sma20) & (price >= ema9)
+    down = (ema9 < ema20) & (ema20 < sma20) & (price <= ema9)
+    return up.astype(np.int8) - down.astype(np.int8)
+
+if njit is not None:
+    @njit("int8[:](float64[:], float64[:], float64[:], float64[:])", cache=True)  # no fastmath: NaN compares must stay False
+    def _trend_codes_nb(price, ema9, ema20, sma20):
+        out = np.zeros(price.shape[0], dtype=np.int8)
+        for i in range(price.shape[0]):
+            e9, e20, s20, p = ema9[i], ema20[i], sma20[i], price[i]
+            if e9 > e20 and e20 > s20 and p >= e9:
+                out[i] = 1
+            elif e9 < e20 and e20 < s20 and p <= e9:
+                out[i] = -1
+        return out
+
+def trend_codes(price, ema9, ema20, sma20) -> np.ndarray:
+    """
+    derive_trend over aligned arrays: int8 codes (UP=1, DOWN=-1, NEUTRAL=0), one per element.
+    For batches (history, replays); a single live tick is cheaper through derive_trend.
+    """
+    arrs = [np.ascontiguousarray(a, dtype=np.float64) for a in (price, ema9, ema20, sma20)]
+    if njit is not None:
+        return _trend_codes_nb(*arrs)
+    return _trend_codes_np(*arrs)
@@ -1,74 +1,315 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
-import argparse, os, re, sys, time, json
+import argparse, hashlib, os, re, sys, time, json
+from collections import OrderedDict
 from dataclasses import dataclass, field, asdict
+from functools import singledispatch
 from math import floor
-from typing import Optional, Dict, Any, List, Iterable, Callable, Tuple, Literal
+from operator import itemgetter
+from typing import Optional, Dict, Any, List, Iterable, Iterator, Callable, Tuple, Literal, Union
 from datetime import datetime
+import numpy as np
+
+try:
+    # optional: Numba compiles the trend-mask kernels to native (multi-threaded) loops; NumPy compares otherwise
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+# ------------------------------- Records -------------------------------------
+@dataclass(slots=True)
+class RecordBatch:
+    """
+    Columnar form of a records list ({"rec": {...}, "raw": str} rows): one float64 array per field
+    plus the raw lines, so trend predicates run as whole-array compares instead of a dict lookup per field per row.
+    """
+    sma20: np.ndarray
+    ema20: np.ndarray
+    ema9: np.ndarray
+    price: np.ndarray
+    raw: List[str]
+
+    def __len__(self) -> int: return len(self.raw)
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]]) -> "RecordBatch":
+        n = len(records)
+        cols = np.fromiter((x for row in records for x in _fields(row["rec"])), dtype=float, count=4 * n).reshape(n, 4)
+        return cls(cols[:, 0].copy(), cols[:, 1].copy(), cols[:, 2].copy(), cols[:, 3].copy(), [row["raw"] for row in records])
+
+_fields = itemgetter("sma20", "ema20", "ema9", "price")
+Records = Union[List[Dict[str, Any]], RecordBatch]
 
 # ------------------------------- Trends --------------------------------------
+# One record dict -> bool; a RecordBatch -> bool mask (elementwise; NaN compares False like the scalar form).
+# Plain rec[...] subscripts on purpose: 3.11 specializes them, and the chained compare skips the last read
+# when the first fails; a bound rec.__getitem__ or an itemgetter is slower per row.
+@singledispatch
 def is_downtrend(rec: Dict[str, Any]) -> bool: return rec["sma20"] > rec["ema20"] > rec["ema9"]
+@singledispatch
 def is_uptrend(rec: Dict[str, Any]) -> bool: return rec["sma20"] < rec["ema20"] < rec["ema9"]
+
+if njit is not None:
+    # no fastmath: NaN compares must stay False (see trend_kernel)
+    @njit("void(float64[::1], float64[::1], float64[::1], bool_[::1])", cache=True, parallel=True)
+    def _uptrend_mask_nb(sma, e20, e9, out):
+        for i in prange(sma.shape[0]):
+            out[i] = sma[i] < e20[i] and e20[i] < e9[i]
+
+    @njit("void(float64[::1], float64[::1], float64[::1], bool_[::1])", cache=True, parallel=True)
+    def _downtrend_mask_nb(sma, e20, e9, out):
+        for i in prange(sma.shape[0]):
+            out[i] = sma[i] > e20[i] and e20[i] > e9[i]
+
+def _mask(kernel, sma20, ema20, ema9) -> np.ndarray:
+    cols = [np.ascontiguousarray(a, dtype=np.float64) for a in (sma20, ema20, ema9)]
+    out = np.empty(cols[0].shape[0], dtype=np.bool_)
+    kernel(*cols, out)
+    return out
+
+def uptrend_mask(sma20: np.ndarray, ema20: np.ndarray, ema9: np.ndarray) -> np.ndarray:
+    if njit is not None: return _mask(_uptrend_mask_nb, sma20, ema20, ema9)
+    return (sma20 < ema20) & (ema20 < ema9)
+def downtrend_mask(sma20: np.ndarray, ema20: np.ndarray, ema9: np.ndarray) -> np.ndarray:
+    if njit is not None: return _mask(_downtrend_mask_nb, sma20, ema20, ema9)
+    return (sma20 > ema20) & (ema20 > ema9)
+@is_uptrend.register(RecordBatch)
+def _(batch: RecordBatch) -> np.ndarray: return uptrend_mask(batch.sma20, batch.ema20, batch.ema9)
+@is_downtrend.register(RecordBatch)
+def _(batch: RecordBatch) -> np.ndarray: return downtrend_mask(batch.sma20, batch.ema20, batch.ema9)
+
 Trend = Optional[Literal["UP","DOWN"]]
 
+_up, _down = is_uptrend.dispatch(dict), is_downtrend.dispatch(dict)  # per-row callers skip the dispatch
+_SCALAR = {is_uptrend: _up, is_downtrend: _down}
+_KIND = {"UP": is_uptrend, "DOWN": is_downtrend}
+def trend_of_fast(sma: float, e20: float, e9: float) -> Trend:
+    """trend_of for callers that already hold the three floats (no record to build or index)."""
+    if sma < e20 < e9: return "UP"
+    if sma > e20 > e9: return "DOWN"
+    return None
+
 def trend_of(rec: Dict[str, Any]) -> Trend:
-    if is_uptrend(rec): return "UP"
-    if is_downtrend(rec): return "DOWN"
+    # is_uptrend / is_downtrend inlined: each field read once, no calls. (Memoizing on the triple costs more
+    # than this: building the key alone is the same three lookups, and rounding it would change the result.)
+    # Same test as trend_of_fast, not a call to it: the extra frame is ~25% of this function.
+    sma, e20, e9 = rec["sma20"], rec["ema20"], rec["ema9"]
+    if sma < e20 < e9: return "UP"
+    if sma > e20 > e9: return "DOWN"
     return None
 
+def trend_mask(records: Records, trend_fn: Callable[[Any], Any] | str) -> np.ndarray:
+    """
+    trend_fn over every row as a bool array; trend_fn may also be a trend name ("UP"/"DOWN"). A RecordBatch
+    is passed to trend_fn whole (is_uptrend / is_downtrend return its mask); a records list is mapped row
+    by row (map + fromiter, no loop body).
+    """
+    if isinstance(trend_fn, str): trend_fn = _KIND[trend_fn]
+    if isinstance(records, RecordBatch): return np.asarray(trend_fn(records), dtype=bool)
+    return np.fromiter(map(_SCALAR.get(trend_fn, trend_fn), map(_rec, records)), dtype=bool, count=len(records))
+
+# ---- trend as a code per row: UP=1, DOWN=-1, none=0 ----
+if njit is not None:
+    @njit("int8[::1](float64[::1], float64[::1], float64[::1])", cache=True, parallel=True)  # no fastmath (NaN)
+    def _batch_trend_codes_nb(sma, e20, e9):
+        out = np.empty(sma.shape[0], dtype=np.int8)
+        for i in prange(sma.shape[0]):
+            d1 = e20[i] - sma[i]; d2 = e9[i] - e20[i]
+            out[i] = np.int8((d1 > 0.0) & (d2 > 0.0)) - np.int8((d1 < 0.0) & (d2 < 0.0))
+        return out
+
+def batch_trend_codes(batch: RecordBatch) -> np.ndarray:
+    """
+    trend_of over a batch without branches: int8 up - down from the signs of ema20 - sma20 and ema9 - ema20
+    (a difference of finite floats is 0 only when they are equal, so this is exactly the chained compare).
+    Not trend_kernel.trend_codes: that one is derive_trend's test, which also checks price against ema9.
+    """
+    cols = [np.ascontiguousarray(a, dtype=np.float64) for a in (batch.sma20, batch.ema20, batch.ema9)]
+    if njit is not None: return _batch_trend_codes_nb(*cols)
+    sma, e20, e9 = cols
+    with np.errstate(over="ignore", invalid="ignore"):  # inf - inf is NaN and 1e308 - -1e308 is inf: both still compare right
+        d1 = e20 - sma; d2 = e9 - e20
+    return ((d1 > 0) & (d2 > 0)).view(np.int8) - ((d1 < 0) & (d2 < 0)).view(np.int8)
+
+_TREND_LABELS = np.array([None, "UP", "DOWN"], dtype=object)  # indexed by code; -1 wraps to "DOWN"
+def trend_labels(codes: np.ndarray) -> List[Trend]:
+    """batch_trend_codes -> trend_of's labels; for reporting, the codes are what to compute on."""
+    return _TREND_LABELS[codes].tolist()
+
+_rec = itemgetter("rec")
+_raw = itemgetter("raw")
+
+_WRITE_BUFFER = 1 << 20  # the writers issue one large write; "\n" newlines are written as-is
+
+# row i's raw line / rows [start, stop)'s raw lines, for either form
+def _raw_of(records: Records) -> Callable[[int], str]:
+    if isinstance(records, RecordBatch): return records.raw.__getitem__
+    return lambda i: records[i]["raw"]
+def _raw_slicer(records: Records) -> Callable[[int, int], Iterable[str]]:
+    if isinstance(records, RecordBatch): return lambda start, stop: records.raw[start:stop]
+    return lambda start, stop: map(_raw, records[start:stop])
+
 # ------------------------------ File outputs ---------------------------------
-def write_trend_lines(records: List[Dict[str, Any]], out_path: str, trend_fn: Callable[[Dict[str, Any]], bool]) -> int:
-    n = 0
-    with open(out_path, "w", encoding="utf-8") as out:
-        for row in records:
-            if trend_fn(row["rec"]):
-                out.write(row["raw"] + "\n")
-                n += 1
-    return n
+def write_trend_lines(records: Records, out_path: str, trend_fn: Callable[[Any], Any]) -> int:
+    idxs = np.flatnonzero(trend_mask(records, trend_fn)).tolist()
+    lines = list(map(_raw_of(records), idxs))
+    with open(out_path, "w", encoding="utf-8", newline="\n", buffering=_WRITE_BUFFER) as out:
+        if lines: out.write("\n".join(lines) + "\n")  # one write, not one per row
+    return len(idxs)
 
-def find_streaks(records: List[Dict[str, Any]], trend_fn: Callable[[Dict[str, Any]], bool]) -> List[Tuple[List[int], float, float]]:
+# ------------------------------- Streaks -------------------------------------
+def streak_bounds(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """[start, end) of every run of True in `mask`, via the edges of the 0/1 sequence padded with 0s."""
+    edges = np.flatnonzero(np.diff(np.r_[0, np.asarray(mask, dtype=np.int8), 0]))
+    return edges[0::2], edges[1::2]
+
+Streak = Tuple[range, float, float]  # (rows [start, stop) of the streak, start_price, end_price); no index list is built
+
+def find_streaks(records: Records, trend_fn: Callable[[Any], Any], mask: Optional[np.ndarray] = None) -> List[Streak]:
     """
-    Returns list of (indices_in_streak, start_price, end_price)
+    Returns list of (indices_in_streak, start_price, end_price); the indices are a range.
     start_price: first price OUTSIDE the streak on the left (if available), else first inside.
     end_price:   first price OUTSIDE the streak on the right (if available), else last inside.
+    `mask` is trend_mask(records, trend_fn) when the caller already has it. With STREAK_CACHE_SIZE set
+    (off by default), results are cached per (records, trend_fn) for sweeps that rerun the same data.
     """
-    streaks: List[Tuple[List[int], float, float]] = []
-    cur: List[int] = []
-
-    def finalize(cur_idx: List[int]):
-        if not cur_idx: return
-        left_idx = cur_idx[0] - 1
-        right_idx = cur_idx[-1] + 1
-        start_price = records[cur_idx[0]]["rec"]["price"]
-        end_price = records[cur_idx[-1]]["rec"]["price"]
-        if left_idx >= 0: start_price = records[left_idx]["rec"]["price"]
-        if right_idx < len(records): end_price = records[right_idx]["rec"]["price"]
-        streaks.append((cur_idx.copy(), start_price, end_price))
-
-    for i, row in enumerate(records):
-        if trend_fn(row["rec"]): cur.append(i)
-        else: finalize(cur); cur = []
-    finalize(cur)
-    return streaks
-
-def write_streaks(records: List[Dict[str, Any]], out_path: str, trend_name: str, trend_fn: Callable[[Dict[str, Any]], bool]) -> int:
-    streaks = find_streaks(records, trend_fn)
-    with open(out_path, "w", encoding="utf-8") as out:
-        for i, (idxs, start_price, end_price) in enumerate(streaks, start=1):
-            header = f"===== {trend_name} Streak #{i} | length: {len(idxs)} | start_price: {start_price:.2f} | end_price: {end_price:.2f} ====="
-            out.write(header + "\n")
-            for idx in idxs: out.write(records[idx]["raw"] + "\n")
-            out.write("\n")
+    if mask is not None: return _streaks_from_mask(records, mask)
+    if STREAK_CACHE_SIZE <= 0: return _streaks_from_mask(records, trend_mask(records, trend_fn))
+    key = _streak_key(records, trend_fn)
+    hit = _streak_cache.get(key)
+    if hit is not None:
+        _streak_cache.move_to_end(key)
+        return list(hit[1])
+    streaks = _streaks_from_mask(records, trend_mask(records, trend_fn))
+    # a records list is keyed by id(): holding it keeps that id from being reused while cached
+    _streak_cache[key] = (None if isinstance(records, RecordBatch) else records, streaks)
+    if len(_streak_cache) > STREAK_CACHE_SIZE: _streak_cache.popitem(last=False)
+    return list(streaks)
+
+# ---- find_streaks cache ----
+# Opt-in, for parameter sweeps. A RecordBatch is keyed on a hash of its columns, so in-place edits miss. A
+# records list only on a cheap fingerprint (id + length + last price) and is held while cached: appending
+# a bar changes its key, rewriting earlier rows of the same list does not (call clear_streak_cache()).
+STREAK_CACHE_SIZE = 0  # (records, trend_fn) results kept, least recently used evicted; 0 disables
+_streak_cache: "OrderedDict[Tuple[Any, ...], Tuple[Optional[Records], List[Streak]]]" = OrderedDict()
+
+def _streak_key(records: Records, trend_fn: Callable[[Any], Any] | str) -> Tuple[Any, ...]:
+    if isinstance(records, RecordBatch):
+        h = hashlib.blake2b(digest_size=16)
+        for col in (records.sma20, records.ema20, records.ema9, records.price):
+            h.update(np.ascontiguousarray(col, dtype=np.float64))
+        return "batch", h.digest(), len(records), trend_fn
+    n = len(records)
+    return id(records), n, trend_fn, records[-1]["rec"]["price"] if n else None
+
+def clear_streak_cache() -> None:
+    _streak_cache.clear()
+
+def _streaks_from_mask(records: Records, mask: np.ndarray) -> List[Streak]:
+    starts, ends = streak_bounds(mask)
+    # the neighbouring rows, clamped into the streak at either end of the records: no per-side branches
+    left, right = np.maximum(starts - 1, 0), np.minimum(ends, len(records) - 1)
+    starts, ends = starts.tolist(), ends.tolist()
+    if isinstance(records, RecordBatch):
+        price = records.price  # two gathers
+        return [(range(s, e), sp, ep) for s, e, sp, ep in zip(starts, ends, price[left].tolist(), price[right].tolist())]
+    # one pass, so both neighbours of a streak are read together
+    return [(range(s, e), records[l]["rec"]["price"], records[r]["rec"]["price"])
+            for s, e, l, r in zip(starts, ends, left.tolist(), right.tolist())]
+
+def write_streaks(records: Records, out_path: str, trend_name: str, trend_fn: Callable[[Any], Any], mask: Optional[np.ndarray] = None) -> int:
+    streaks = find_streaks(records, trend_fn, mask)
+    header, raw_slice = _streak_format(trend_name), _raw_slicer(records)
+    parts: List[str] = []
+    for i, (idxs, start_price, end_price) in enumerate(streaks, start=1):
+        parts.append(header % (i, len(idxs), start_price, end_price))
+        parts.extend(raw_slice(idxs.start, idxs.stop))
+        parts.append("")  # blank line after each streak
+    with open(out_path, "w", encoding="utf-8", newline="\n", buffering=_WRITE_BUFFER) as out:
+        if parts: out.write("\n".join(parts) + "\n")
     return len(streaks)
 
+def _streak_format(trend_name: str) -> str:
+    """Header template with the trend name filled in once; % (i, length, start_price, end_price) per streak."""
+    return "===== %s Streak #%%d | length: %%d | start_price: %%.2f | end_price: %%.2f =====" % trend_name.replace("%", "%%")
+
+# ---- online (streaming) streaks ----
+class StreakDetector:
+    """
+    find_streaks one row at a time: keeps the open streak's start and the previous row's price instead of
+    the records list. push() returns a streak once the first row after it arrives (that row's price is
+    its end_price); flush() closes a streak still open at the end of the stream. Indices count pushes.
+    With keep_raw, `lines` holds the raw lines of the streak last returned.
+    """
+    __slots__ = ("trend_fn", "keep_raw", "lines", "_i", "_start", "_start_price", "_prev_price", "_cur")
+
+    def __init__(self, trend_fn: Callable[[Any], Any] | str, keep_raw: bool = False) -> None:
+        if isinstance(trend_fn, str): trend_fn = _KIND[trend_fn]
+        self.trend_fn = _SCALAR.get(trend_fn, trend_fn)
+        self.keep_raw = keep_raw
+        self.lines: List[str] = []
+        self._i = 0
+        self._start: Optional[int] = None
+        self._start_price: Optional[float] = None
+        self._prev_price: Optional[float] = None
+        self._cur: List[str] = []
+
+    def push(self, rec: Dict[str, Any], raw: Optional[str] = None) -> Optional[Streak]:
+        i = self._i; self._i = i + 1
+        price = rec["price"]
+        done = None
+        if self.trend_fn(rec):
+            if self._start is None:
+                self._start = i
+                self._start_price = price if self._prev_price is None else self._prev_price
+            if self.keep_raw: self._cur.append(raw)
+        elif self._start is not None:
+            done = (range(self._start, i), self._start_price, price)
+            self._close()
+        self._prev_price = price
+        return done
+
+    def flush(self) -> Optional[Streak]:
+        if self._start is None: return None
+        done = (range(self._start, self._i), self._start_price, self._prev_price)
+        self._close()
+        return done
+
+    def _close(self) -> None:
+        self.lines, self._cur = self._cur, []
+        self._start = None
+
+def iter_streaks(rows: Iterable[Dict[str, Any]], trend_fn: Callable[[Any], Any] | str, keep_raw: bool = False) -> Iterator[Tuple[Streak, List[str]]]:
+    """find_streaks over an iterable of {"rec", "raw"} rows as they arrive; yields (streak, raw lines if keep_raw)."""
+    det = StreakDetector(trend_fn, keep_raw=keep_raw)
+    for row in rows:
+        streak = det.push(row["rec"], row["raw"])
+        if streak is not None: yield streak, det.lines
+    streak = det.flush()
+    if streak is not None: yield streak, det.lines
+
+def write_streaks_stream(rows: Iterable[Dict[str, Any]], out_path: str, trend_name: str, trend_fn: Callable[[Any], Any] | str) -> int:
+    """write_streaks for a stream of rows: each streak is written when it closes, only its own lines are held."""
+    n, header = 0, _streak_format(trend_name)
+    with open(out_path, "w", encoding="utf-8", newline="\n", buffering=_WRITE_BUFFER) as out:
+        for n, ((idxs, start_price, end_price), lines) in enumerate(iter_streaks(rows, trend_fn, keep_raw=True), start=1):
+            out.write("\n".join([header % (n, len(idxs), start_price, end_price), *lines, ""]) + "\n")
+    return n
+
 
 # ------------------------------- Position state ------------------------------
-@dataclass
+@dataclass(slots=True)
 class PositionState:
     side: Optional[Literal["CALL","PUT"]] = None
     last_trend: Trend = None
 
+# trend -> (side it wants, broker method that opens it, label when opened from flat)
+_BUY_BY_TREND: Dict[str, Tuple[Literal["CALL","PUT"], str, str]] = {
+    "UP": ("CALL", "buy_call", "OPENED_CALL"),
+    "DOWN": ("PUT", "buy_put", "OPENED_PUT"),
+}
+
 def handle_trend(trend: Trend, state: PositionState, symbol: str, broker: BrokerInterface, qty: int = 1, context: Optional[Dict[str, Any]] = None, reenter_on_reverse: bool = True) -> str:
     """
     Acts on the new trend:
@@ -82,12 +323,12 @@ def handle_trend(trend: Trend, state: PositionState, symbol: str, broker: Broker
         state.last_trend = None
         return "NO_TREND"
 
-    desired_side: Optional[Literal["CALL","PUT"]] = "CALL" if trend == "UP" else "PUT"
+    desired_side, buy, opened = _BUY_BY_TREND.get(trend) or _BUY_BY_TREND["DOWN"]  # anything but UP buys puts
 
     if state.side is None:
-        (broker.buy_call if desired_side=="CALL" else broker.buy_put)(symbol, qty, context)
+        getattr(broker, buy)(symbol, qty, context)
         state.side = desired_side; state.last_trend = trend
-        return f"OPENED_{desired_side}"
+        return opened
 
     if state.side == desired_side:
         state.last_trend = trend
@@ -99,6 +340,59 @@ def handle_trend(trend: Trend, state: PositionState, symbol: str, broker: Broker
         state.last_trend = trend
         return "REVERSED_EXITED"
 
-    (broker.buy_call if desired_side=="CALL" else broker.buy_put)(symbol, qty, context)
+    getattr(broker, buy)(symbol, qty, context)
     state.side = desired_side; state.last_trend = trend
-    return "REVERSED_EXITED_OPENED"
\ No newline at end of file
+    return "REVERSED_EXITED_OPENED"
+
+
+# ---- handle_trend over a whole backtest (no broker; trade events only) ----
+# action codes in the replay's output, decoded with HANDLE_ACTIONS at the Python boundary
+HANDLE_ACTIONS = ("NO_TREND", "HELD", "OPENED_CALL", "OPENED_PUT", "REVERSED_EXITED", "REVERSED_EXITED_OPENED")
+_NO_TREND, _HELD, _OPENED_CALL, _OPENED_PUT, _REV_EXITED, _REV_OPENED = range(6)
+_SIDE_CODE = {None: 0, "CALL": 1, "PUT": -1}
+_SIDE_NAME = {0: None, 1: "CALL", -1: "PUT"}
+
+def _replay(codes, side, reenter, out):
+    """handle_trend's state machine over trend codes (1 UP, -1 DOWN, 0 none); side 1 CALL, -1 PUT, 0 flat."""
+    for i in range(len(codes)):
+        c = codes[i]
+        if c == 0:
+            out[i] = _NO_TREND
+            continue
+        want = 1 if c > 0 else -1
+        if side == 0:
+            out[i] = _OPENED_CALL if want == 1 else _OPENED_PUT
+            side = want
+        elif side == want:
+            out[i] = _HELD
+        elif reenter:
+            out[i] = _REV_OPENED
+            side = want
+        else:
+            out[i] = _REV_EXITED
+            side = 0
+    return side
+
+if njit is not None:
+    _replay_nb = njit("int64(int8[::1], int64, boolean, int8[::1])", cache=True)(_replay)
+
+def handle_trend_batch(trends: np.ndarray, state: PositionState, reenter_on_reverse: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    handle_trend for every bar of a batch_trend_codes array in one pass, without a broker. Returns
+    (bar indices, action codes) of the bars where handle_trend would call the broker (opens, exits, reversals);
+    HANDLE_ACTIONS[code] is the label it would return. `state` ends as the per-bar calls would leave it.
+    """
+    codes = np.ascontiguousarray(trends, dtype=np.int8)
+    out = np.empty(codes.shape[0], dtype=np.int8)
+    side0 = _SIDE_CODE[state.side]
+    if njit is not None:
+        side = _replay_nb(codes, side0, bool(reenter_on_reverse), out)
+    else:
+        acts = [0] * len(codes)  # the loop over Python ints/lists, not NumPy scalars
+        side = _replay(codes.tolist(), side0, reenter_on_reverse, acts)
+        out[:] = acts
+    if len(codes):
+        state.side = _SIDE_NAME[side]
+        state.last_trend = _TREND_LABELS[codes[-1]]
+    idx = np.flatnonzero(out > _HELD)
+    return idx, out[idx]